@@ -1,5 +1,6 @@
 from .main import app
 from .schemas import ChatRequest, ChatResponse
-from .session_manager import SessionManager
+from .session_manager import SessionManager, RedisSessionManager
+from .batch_scheduler import BatchScheduler
 
-__all__ = ["app", "ChatRequest", "ChatResponse", "SessionManager"]
+__all__ = ["app", "ChatRequest", "ChatResponse", "SessionManager", "RedisSessionManager", "BatchScheduler"]
@@ -0,0 +1,109 @@
+"""
+Micro-batching scheduler for concurrent chat requests
+Requests arriving within a short window are coalesced into one RAG chain call
+"""
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+from models import Conversation, MentalHealthRAGChain, RAGResponse
+
+
+logger = logging.getLogger(__name__)
+
+
+class BatchScheduler:
+    """
+    Coalesces in-flight chat requests into batched `chat_batch` calls
+    A batch is dispatched when max_batch requests are queued or max_wait_ms has passed
+    """
+
+    def __init__(
+        self,
+        chain: MentalHealthRAGChain,
+        max_batch: int = 16,
+        max_wait_ms: int = 15
+    ):
+        self.chain = chain
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+
+        self._queue: Deque[Tuple[str, Conversation, asyncio.Future]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: set = set()
+
+        logger.info(f"Initialized BatchScheduler with max_batch={max_batch}, max_wait_ms={max_wait_ms}")
+
+    def start(self) -> None:
+        """Start the background batching loop on the running event loop"""
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the batching loop and fail any queued requests"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        while self._queue:
+            _, _, future = self._queue.popleft()
+            if not future.done():
+                future.set_exception(RuntimeError("Batch scheduler stopped"))
+
+    async def submit(
+        self,
+        message: str,
+        chat_history: Optional[Conversation] = None
+    ) -> RAGResponse:
+        """Queue a chat request and wait for its response"""
+        self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append((message, chat_history or Conversation(), future))
+        self._wakeup.set()
+
+        return await future
+
+    async def _run(self) -> None:
+        """Collect queued requests into batches and dispatch them"""
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+            if len(self._queue) < self.max_batch:
+                await asyncio.sleep(self.max_wait)
+
+            while self._queue:
+                size = min(self.max_batch, len(self._queue))
+                batch = [self._queue.popleft() for _ in range(size)]
+
+                task = asyncio.create_task(self._dispatch(batch))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: List[Tuple[str, Conversation, asyncio.Future]]) -> None:
+        """Run one batch through the chain and resolve its futures"""
+        messages = [message for message, _, _ in batch]
+        histories = [history for _, history, _ in batch]
+
+        logger.debug(f"Dispatching chat batch of {len(batch)}")
+
+        try:
+            responses = await self.chain.chat_batch(messages, histories)
+        except Exception as e:
+            logger.error(f"Error in chat batch: {e}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), response in zip(batch, responses):
+            if not future.done():
+                future.set_result(response)
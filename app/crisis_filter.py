@@ -0,0 +1,59 @@
+"""
+Fast crisis keyword pre-filter
+Runs before the RAG chain so obvious crisis messages skip the LLM entirely
+"""
+import logging
+from typing import List
+
+from utils.crisis_patterns import compile_crisis_regex, crisis_patterns, normalize_message
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+
+logger = logging.getLogger(__name__)
+
+
+class CrisisFilter:
+    """
+    Keyword matcher compiled once at startup
+    Uses a Hyperscan DFA database when available, otherwise a single compiled regex;
+    patterns and normalization come from utils.crisis_patterns, shared with the RAG chain
+
+    Hyperscan scratch space is not thread-safe, so scan only from the event loop thread.
+    """
+
+    def __init__(self, keywords: List[str]):
+        self.keywords = [k.lower() for k in keywords]
+        self._db = None
+        self._regex = None
+        patterns = crisis_patterns(self.keywords)
+
+        if hyperscan is not None:
+            self._db = hyperscan.Database()
+            self._db.compile(
+                expressions=[p.encode() for p in patterns],
+                ids=list(range(len(patterns))),
+                flags=[hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_UTF8] * len(patterns)
+            )
+            logger.info(f"Compiled Hyperscan crisis filter with {len(patterns)} patterns")
+        else:
+            self._regex = compile_crisis_regex(self.keywords)
+            logger.info(f"Compiled regex crisis filter with {len(patterns)} patterns")
+
+    def is_crisis(self, text: str) -> bool:
+        """Check whether the text contains any crisis keyword"""
+        normalized = normalize_message(text)
+
+        if self._db is None:
+            return self._regex.search(normalized) is not None
+
+        matches = []
+
+        def on_match(pattern_id, start, end, flags, context):
+            matches.append(pattern_id)
+
+        self._db.scan(normalized.encode(), match_event_handler=on_match)
+        return bool(matches)
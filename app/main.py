@@ -4,27 +4,39 @@ Production-ready REST API with RAG capabilities
 """
 import os
 import sys
+import time
 import uuid
+import random
+import asyncio
+import multiprocessing
 import logging
 from pathlib import Path
 from datetime import datetime
 from contextlib import asynccontextmanager
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
 
+import httpx
+from openai import AsyncOpenAI, OpenAI
 from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+import orjson
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from config import settings, SYSTEM_PROMPT
-from utils import DataLoader, VectorStore
-from models import MentalHealthRAGChain
+from config import settings, SYSTEM_PROMPT, CRISIS_KEYWORDS
+from utils import VectorStore, SemanticCache, EmbeddingStore, load_all_datasets
+from models import Conversation, MentalHealthRAGChain
 from app.schemas import (
     ChatRequest, ChatResponse, HealthCheckResponse, 
-    StatsResponse, ErrorResponse, ContextItem
+    StatsResponse, SessionStatsResponse, IntakeRequest, IntakeResponse
 )
-from app.session_manager import SessionManager
+from app.session_manager import SessionManager, RedisSessionManager, SessionStore
+from app.batch_scheduler import BatchScheduler
+from app.query_cache import QueryCache
+from app.crisis_filter import CrisisFilter
 
 
 logging.basicConfig(
@@ -34,14 +46,44 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+openai_client: Optional[AsyncOpenAI] = None
 vector_store: Optional[VectorStore] = None
 rag_chain: Optional[MentalHealthRAGChain] = None
-session_manager: Optional[SessionManager] = None
+session_manager: Optional[SessionStore] = None
+batch_scheduler: Optional[BatchScheduler] = None
+query_cache: Optional[QueryCache] = None
+crisis_filter = CrisisFilter(CRISIS_KEYWORDS)
 
+# Message IDs only need to be unique, not unguessable
+_message_id_rng = random.Random(os.urandom(16))
 
-def initialize_components():
+SESSION_SWEEP_INTERVAL_SECONDS = 60
+STATS_CACHE_TTL_SECONDS = 5
+_stats_cache = {"ts": 0.0, "value": None}
+
+
+def get_reload_executor() -> ProcessPoolExecutor:
+    """Dataset parsing pool, kept off the default thread pool used by request handlers"""
+    if getattr(app.state, "reload_executor", None) is None:
+        app.state.reload_executor = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return app.state.reload_executor
+
+
+async def load_documents():
+    """
+    Parse the datasets in a separate process
+    Chroma writes stay in this process, which owns the sqlite handle
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_reload_executor(), load_all_datasets, settings.DATA_DIR)
+
+
+async def initialize_components():
     """Initialize all components"""
-    global vector_store, rag_chain, session_manager
+    global openai_client, vector_store, rag_chain, session_manager, batch_scheduler, query_cache
     
     logger.info("Initializing components...")
     
@@ -51,34 +93,100 @@ def initialize_components():
         return False
     
     try:
-        vector_store = VectorStore(
+        # Two pooled HTTP/2 clients per process, async for the event loop and
+        # sync for embedding calls made from worker threads; each has its own
+        # pool with these limits, so up to twice OPENAI_MAX_CONNECTIONS can be open
+        limits = httpx.Limits(
+            max_connections=settings.OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS
+        )
+        timeout = httpx.Timeout(settings.OPENAI_TIMEOUT_SECONDS)
+        openai_client = AsyncOpenAI(
+            api_key=api_key,
+            http_client=httpx.AsyncClient(http2=True, limits=limits, timeout=timeout)
+        )
+        sync_openai_client = OpenAI(
+            api_key=api_key,
+            http_client=httpx.Client(http2=True, limits=limits, timeout=timeout)
+        )
+        
+        vector_store = await asyncio.to_thread(
+            VectorStore,
             persist_directory=settings.CHROMA_PERSIST_DIRECTORY,
             collection_name=settings.COLLECTION_NAME,
             openai_api_key=api_key,
-            embedding_model=settings.EMBEDDING_MODEL
+            embedding_model=settings.EMBEDDING_MODEL,
+            embedding_dimensions=settings.EMBEDDING_DIMENSIONS,
+            ann_profile=settings.ANN_PROFILE,
+            hnsw_m=settings.HNSW_M,
+            hnsw_construction_ef=settings.HNSW_CONSTRUCTION_EF,
+            openai_client=sync_openai_client,
+            async_openai_client=openai_client,
+            embedding_cache_size=settings.EMBEDDING_CACHE_SIZE,
+            embedding_coalesce_ms=settings.EMBEDDING_COALESCE_MS,
+            embedding_store=EmbeddingStore(
+                settings.EMBEDDING_STORE_PATH,
+                embedding_model=settings.EMBEDDING_MODEL,
+                embedding_dimensions=settings.EMBEDDING_DIMENSIONS
+            ) if settings.EMBEDDING_STORE_PATH else None,
+            result_cache=SemanticCache(
+                max_size=settings.RESULT_CACHE_SIZE,
+                threshold=settings.RESULT_CACHE_THRESHOLD,
+                quantize=settings.SEMANTIC_CACHE_QUANTIZE
+            )
         )
         
-        stats = vector_store.get_collection_stats()
+        stats = await asyncio.to_thread(vector_store.get_collection_stats)
         if stats['count'] == 0:
             logger.info("Vector store is empty, loading data...")
-            data_loader = DataLoader(settings.DATA_DIR)
-            documents = data_loader.load_all_datasets()
+            documents = await load_documents()
             if documents:
-                vector_store.add_documents(documents)
+                await vector_store.add_documents_bulk(documents)
                 logger.info(f"Indexed {len(documents)} documents")
         else:
             logger.info(f"Vector store has {stats['count']} documents")
         
+        query_cache = QueryCache(
+            max_size=settings.QUERY_CACHE_SIZE,
+            ttl_seconds=settings.QUERY_CACHE_TTL_SECONDS
+        )
+        
         rag_chain = MentalHealthRAGChain(
             vector_store=vector_store,
-            openai_api_key=api_key,
+            openai_client=openai_client,
             llm_model=settings.LLM_MODEL,
             temperature=settings.LLM_TEMPERATURE,
             max_tokens=settings.LLM_MAX_TOKENS,
-            retrieval_top_k=settings.RETRIEVAL_TOP_K
+            retrieval_top_k=settings.RETRIEVAL_TOP_K,
+            query_cache=query_cache,
+            response_cache=QueryCache(
+                max_size=settings.RESPONSE_CACHE_SIZE,
+                ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS
+            ),
+            semantic_cache=SemanticCache(
+                max_size=settings.SEMANTIC_CACHE_SIZE,
+                threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+                quantize=settings.SEMANTIC_CACHE_QUANTIZE
+            )
         )
         
-        session_manager = SessionManager()
+        batch_scheduler = BatchScheduler(
+            chain=rag_chain,
+            max_batch=settings.BATCH_MAX_SIZE,
+            max_wait_ms=settings.BATCH_MAX_WAIT_MS
+        )
+        
+        if settings.REDIS_URL:
+            session_manager = RedisSessionManager(
+                redis_url=settings.REDIS_URL,
+                session_ttl_hours=settings.SESSION_TTL_HOURS,
+                max_messages_per_session=settings.MAX_MESSAGES_PER_SESSION
+            )
+        else:
+            session_manager = SessionManager(
+                session_ttl_hours=settings.SESSION_TTL_HOURS,
+                max_messages_per_session=settings.MAX_MESSAGES_PER_SESSION
+            )
         
         logger.info("All components initialized successfully")
         return True
@@ -88,12 +196,41 @@ def initialize_components():
         return False
 
 
+async def sweep_sessions_periodically():
+    """Evict expired sessions every SESSION_SWEEP_INTERVAL_SECONDS"""
+    while True:
+        await asyncio.sleep(SESSION_SWEEP_INTERVAL_SECONDS)
+        if session_manager:
+            try:
+                removed = await session_manager.sweep_expired()
+                if removed:
+                    logger.info(f"Removed {removed} expired sessions")
+            except Exception as e:
+                logger.error(f"Error sweeping sessions: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup/shutdown"""
-    initialize_components()
+    await initialize_components()
+    sweeper = asyncio.create_task(sweep_sessions_periodically())
     yield
     logger.info("Shutting down...")
+    sweeper.cancel()
+    if batch_scheduler:
+        await batch_scheduler.stop()
+    if openai_client:
+        await openai_client.close()
+    if vector_store:
+        if vector_store.embedding_coalescer:
+            await vector_store.embedding_coalescer.stop()
+        vector_store.openai_client.close()
+        if vector_store.embedding_store:
+            vector_store.embedding_store.close()
+    if session_manager:
+        await session_manager.close()
+    if getattr(app.state, "reload_executor", None) is not None:
+        app.state.reload_executor.shutdown(cancel_futures=True)
 
 app = FastAPI(
     title="Mental Health Support Chatbot API",
@@ -111,7 +248,8 @@ app = FastAPI(
     - Crisis resources are provided when concerning content is detected
     """,
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
@@ -122,18 +260,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Context-rich /chat answers run to several KB; small replies are sent as-is
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     logger.error(f"Unhandled exception: {exc}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
-        content=ErrorResponse(
-            error="Internal server error",
-            detail=str(exc) if settings.DEBUG else None
-        ).model_dump()
+        content={
+            "error": "Internal server error",
+            "detail": str(exc) if settings.DEBUG else None,
+            "timestamp": datetime.utcnow().isoformat()
+        }
     )
 
 
+async def get_cached_collection_stats() -> dict:
+    """Collection stats, recomputed off the event loop at most once per STATS_CACHE_TTL_SECONDS"""
+    now = time.monotonic()
+    if _stats_cache["value"] is None or now - _stats_cache["ts"] >= STATS_CACHE_TTL_SECONDS:
+        _stats_cache["value"] = await asyncio.to_thread(vector_store.get_collection_stats)
+        _stats_cache["ts"] = now
+    return _stats_cache["value"]
+
+
 def get_rag_chain() -> MentalHealthRAGChain:
     """Dependency to get RAG chain"""
     if rag_chain is None:
@@ -144,36 +295,78 @@ def get_rag_chain() -> MentalHealthRAGChain:
     return rag_chain
 
 
-def get_session_manager() -> SessionManager:
+def get_batch_scheduler() -> BatchScheduler:
+    """Dependency to get batch scheduler"""
+    if batch_scheduler is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Service not initialized. Please check API key configuration."
+        )
+    return batch_scheduler
+
+
+def get_session_manager() -> SessionStore:
     """Dependency to get session manager"""
     if session_manager is None:
         raise HTTPException(status_code=503, detail="Session manager not initialized")
     return session_manager
 
 
+async def load_conversation(sessions: SessionStore, session_id: str) -> Conversation:
+    """Session history, empty if unavailable"""
+    try:
+        return await sessions.get_conversation(session_id)
+    except Exception:
+        return Conversation()
+
+
+async def prepare_turn(
+    chain: MentalHealthRAGChain,
+    sessions: SessionStore,
+    session_id: str,
+    message: str
+) -> Tuple[bool, Conversation]:
+    """
+    Crisis-screen a message and load its session
+    Non-crisis messages are embedded while the session loads
+    Returns: (is_crisis, conversation)
+    """
+    if crisis_filter.is_crisis(message):
+        return True, await load_conversation(sessions, session_id)
+    _, conversation = await asyncio.gather(
+        chain.prefetch_embedding(message),
+        load_conversation(sessions, session_id)
+    )
+    return False, conversation
+
+
+ROOT_RESPONSE_BODY = orjson.dumps({
+    "message": "Mental Health Support Chatbot API",
+    "version": "1.0.0",
+    "docs": "/docs",
+    "health": "/health"
+})
+
+
 @app.get("/", tags=["Root"])
 async def root():
     """Root endpoint"""
-    return {
-        "message": "Mental Health Support Chatbot API",
-        "version": "1.0.0",
-        "docs": "/docs",
-        "health": "/health"
-    }
+    return Response(content=ROOT_RESPONSE_BODY, media_type="application/json")
 
 
 @app.get("/health", response_model=HealthCheckResponse, tags=["Health"])
 async def health_check():
     """Health check endpoint"""
     vs_status = "healthy" if vector_store else "not_initialized"
-    doc_count = vector_store.get_collection_stats()['count'] if vector_store else 0
+    doc_count = (await get_cached_collection_stats())['count'] if vector_store else 0
     
-    return HealthCheckResponse(
-        status="healthy" if rag_chain else "degraded",
-        version="1.0.0",
-        vector_store_status=vs_status,
-        document_count=doc_count
-    )
+    return ORJSONResponse({
+        "status": "healthy" if rag_chain else "degraded",
+        "version": "1.0.0",
+        "vector_store_status": vs_status,
+        "document_count": doc_count,
+        "timestamp": datetime.utcnow().isoformat()
+    })
 
 
 @app.get("/stats", response_model=StatsResponse, tags=["Stats"])
@@ -182,71 +375,194 @@ async def get_stats():
     if not vector_store:
         raise HTTPException(status_code=503, detail="Vector store not initialized")
     
-    stats = vector_store.get_collection_stats()
+    stats = await get_cached_collection_stats()
+    cache_stats = query_cache.get_stats() if query_cache else {'hits': 0, 'misses': 0}
     
-    return StatsResponse(
-        total_documents=stats['count'],
-        collection_name=stats['name'],
-        embedding_model=settings.EMBEDDING_MODEL,
-        llm_model=settings.LLM_MODEL
-    )
+    return ORJSONResponse({
+        "total_documents": stats['count'],
+        "collection_name": stats['name'],
+        "embedding_model": settings.EMBEDDING_MODEL,
+        "llm_model": settings.LLM_MODEL,
+        "query_cache_hits": cache_stats['hits'],
+        "query_cache_misses": cache_stats['misses']
+    })
+
+
+def build_chat_response(response, include_context: bool = False) -> dict:
+    """
+    Build the /chat response body (ChatResponse fields) from a RAGResponse
+    Values come from our own chain, so no pydantic models are built;
+    the plain dict is serialized by orjson
+    """
+    context = None
+    if include_context:
+        context = [
+            {
+                "content": item['content'],
+                "source": item['metadata'].get('source', ''),
+                "similarity": item['similarity'],
+                "metadata": item['metadata']
+            }
+            for item in response.retrieved_context
+        ]
+    
+    return {
+        "message_id": f"msg_{_message_id_rng.getrandbits(48):012x}",
+        "response": response.answer,
+        "classification": response.classification,
+        "confidence": response.confidence,
+        "is_crisis": response.is_crisis,
+        "is_final_analysis": False,
+        "status_label": response.status_label,
+        "show_label": response.show_label,
+        "message_count": response.message_count,
+        "messages_until_analysis": 0,
+        "context": context,
+        "timestamp": datetime.utcnow()
+    }
 
 
-@app.post("/chat", tags=["Chat"])
+@app.post("/chat", response_model=ChatResponse, tags=["Chat"])
 async def chat(
     request: ChatRequest,
     chain: MentalHealthRAGChain = Depends(get_rag_chain),
-    sessions: SessionManager = Depends(get_session_manager)
+    scheduler: BatchScheduler = Depends(get_batch_scheduler),
+    sessions: SessionStore = Depends(get_session_manager)
 ):
     """
     Main chat endpoint - natural flowing conversation with real-time status labeling
     """
     try:
-        session_id = request.session_id or str(uuid.uuid4())
+        session_id = request.session_id or uuid.uuid4().hex
+        is_crisis, chat_history = await prepare_turn(chain, sessions, session_id, request.message)
+        
+        if is_crisis:
+            response = chain.build_crisis_response(chat_history)
+        else:
+            response = await scheduler.submit(request.message, chat_history)
         
-        chat_history = []
         try:
-            chat_history = sessions.get_chat_history(session_id)
-        except:
+            await sessions.add_message(
+                session_id, "user", request.message, response.classification, response.is_crisis
+            )
+            await sessions.add_message(session_id, "assistant", response.answer)
+        except Exception:
             pass
         
-        response = chain.chat(
-            user_message=request.message,
-            chat_history=chat_history
-        )
+        return ORJSONResponse(build_chat_response(response, request.include_context))
         
+    except Exception as e:
+        logger.error(f"Error in chat: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/chat/stream", tags=["Chat"])
+async def chat_stream(
+    request: ChatRequest,
+    chain: MentalHealthRAGChain = Depends(get_rag_chain),
+    sessions: SessionStore = Depends(get_session_manager)
+):
+    """
+    Streaming chat endpoint (Server-Sent Events)
+    Sends `data: {"delta": ...}` events as the reply is generated, then one
+    `event: done` whose data is the full ChatResponse
+    """
+    session_id = request.session_id or uuid.uuid4().hex
+    is_crisis, chat_history = await prepare_turn(chain, sessions, session_id, request.message)
+    
+    async def events():
         try:
-            sessions.add_message(session_id, "user", request.message, response.classification, response.is_crisis)
-            sessions.add_message(session_id, "assistant", response.answer)
-        except:
+            if is_crisis:
+                response = chain.build_crisis_response(chat_history)
+                yield b"data: " + orjson.dumps({"delta": response.answer}) + b"\n\n"
+            else:
+                async for item in chain.chat_stream(request.message, chat_history):
+                    if isinstance(item, str):
+                        yield b"data: " + orjson.dumps({"delta": item}) + b"\n\n"
+                    else:
+                        response = item
+            
+            try:
+                await sessions.add_message(
+                    session_id, "user", request.message, response.classification, response.is_crisis
+                )
+                await sessions.add_message(session_id, "assistant", response.answer)
+            except Exception:
+                pass
+            
+            body = build_chat_response(response, request.include_context)
+            yield b"event: done\ndata: " + orjson.dumps(body) + b"\n\n"
+            
+        except Exception as e:
+            logger.error(f"Error in streaming chat: {e}")
+            yield b"event: error\ndata: " + orjson.dumps({"error": "Internal server error"}) + b"\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/chat/intake", response_model=IntakeResponse, tags=["Chat"])
+async def chat_intake(
+    request: IntakeRequest,
+    chain: MentalHealthRAGChain = Depends(get_rag_chain),
+    sessions: SessionStore = Depends(get_session_manager)
+):
+    """
+    Bulk intake endpoint - several entries (e.g. a journal) in one request
+    Entries are embedded in one request and answered concurrently; each is
+    answered on its own, without conversation history
+    """
+    try:
+        session_id = request.session_id or uuid.uuid4().hex
+        
+        responses = [None] * len(request.entries)
+        pending = []
+        for i, entry in enumerate(request.entries):
+            if crisis_filter.is_crisis(entry):
+                responses[i] = chain.build_crisis_response()
+            else:
+                pending.append(i)
+        
+        if pending:
+            answered = await chain.chat_batch([request.entries[i] for i in pending])
+            for i, response in zip(pending, answered):
+                responses[i] = response
+        
+        try:
+            for entry, response in zip(request.entries, responses):
+                await sessions.add_message(
+                    session_id, "user", entry, response.classification, response.is_crisis
+                )
+        except Exception:
             pass
         
-        return {
-            "message_id": f"msg_{uuid.uuid4().hex[:12]}",
-            "response": response.answer,
-            "classification": response.classification,
-            "confidence": response.confidence,
-            "is_crisis": response.is_crisis,
-            "status_label": response.status_label,  
-            "show_label": response.show_label,      
-            "message_count": response.message_count
-        }
+        return ORJSONResponse({
+            "session_id": session_id,
+            "results": [build_chat_response(r, request.include_context) for r in responses]
+        })
         
     except Exception as e:
-        logger.error(f"Error in chat: {e}")
+        logger.error(f"Error in intake: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/chat/simple", tags=["Chat"])
 async def chat_simple(
     message: str,
-    chain: MentalHealthRAGChain = Depends(get_rag_chain)
+    chain: MentalHealthRAGChain = Depends(get_rag_chain),
+    scheduler: BatchScheduler = Depends(get_batch_scheduler)
 ):
     """
     Simplified chat endpoint - just message in, response out
     """
     try:
-        response = chain.chat(user_message=message)
+        if crisis_filter.is_crisis(message):
+            response = chain.build_crisis_response()
+        else:
+            response = await scheduler.submit(message)
         
         return {
             "response": response.answer,
@@ -262,21 +578,21 @@ async def chat_simple(
 @app.delete("/session/{session_id}", tags=["Session"])
 async def clear_session(
     session_id: str,
-    sessions: SessionManager = Depends(get_session_manager)
+    sessions: SessionStore = Depends(get_session_manager)
 ):
     """Clear a chat session"""
-    if sessions.clear_session(session_id):
+    if await sessions.clear_session(session_id):
         return {"message": f"Session {session_id} cleared"}
     raise HTTPException(status_code=404, detail="Session not found")
 
 
-@app.get("/session/{session_id}/stats", tags=["Session"])
+@app.get("/session/{session_id}/stats", response_model=SessionStatsResponse, tags=["Session"])
 async def get_session_stats(
     session_id: str,
-    sessions: SessionManager = Depends(get_session_manager)
+    sessions: SessionStore = Depends(get_session_manager)
 ):
     """Get statistics for a session"""
-    stats = sessions.get_session_stats(session_id)
+    stats = await sessions.get_session_stats(session_id)
     if stats:
         return stats
     raise HTTPException(status_code=404, detail="Session not found")
@@ -289,13 +605,17 @@ async def reload_index(
 ):
     """Reload the vector store index from data files"""
     
-    def reload_task():
+    async def reload_task():
         try:
-            data_loader = DataLoader(settings.DATA_DIR)
-            documents = data_loader.load_all_datasets()
+            documents = await load_documents()
             if documents:
-                vector_store.clear_collection()
-                vector_store.add_documents(documents)
+                await asyncio.to_thread(vector_store.clear_collection)
+                await vector_store.add_documents_bulk(documents)
+                if query_cache:
+                    query_cache.clear()
+                chain.response_cache.clear()
+                chain.semantic_cache.clear()
+                _stats_cache["ts"] = 0.0
                 logger.info(f"Reloaded {len(documents)} documents")
         except Exception as e:
             logger.error(f"Error reloading index: {e}")
@@ -312,5 +632,7 @@ if __name__ == "__main__":
         host=settings.HOST,
         port=settings.PORT,
         reload=settings.DEBUG,
+        loop="uvloop" if sys.platform != "win32" else "auto",
+        http="httptools",
         log_level=settings.LOG_LEVEL.lower()
     )
\ No newline at end of file
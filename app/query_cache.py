@@ -0,0 +1,81 @@
+"""
+LRU + TTL cache for knowledge base retrieval results and chat replies
+"""
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from models import normalize_message
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCache:
+    """
+    Thread-safe LRU cache with per-entry TTL
+    Keys are built from the normalized query text and top_k
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 300):
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+        logger.info(f"Initialized QueryCache with max_size={max_size}, ttl={ttl_seconds}s")
+
+    @staticmethod
+    def make_key(query: str, top_k: int) -> str:
+        """Build a cache key from raw query text and top_k"""
+        return QueryCache.key_for(normalize_message(query), top_k)
+
+    @staticmethod
+    def key_for(normalized: str, top_k: int) -> str:
+        """Build a cache key from text already passed through normalize_message"""
+        return hashlib.sha1(f"{normalized}{top_k}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a cached value, or None on miss or expiry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value, evicting the least recently used entry if full"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        """Get cache hit/miss counters"""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses
+            }
@@ -2,7 +2,7 @@
 Pydantic schemas for API request/response validation
 """
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import Annotated, List, Optional, Dict, Any
 from datetime import datetime
 
 
@@ -23,6 +23,15 @@ class ChatRequest(BaseModel):
         }
 
 
+class IntakeRequest(BaseModel):
+    """Request schema for bulk intake (e.g. journal entries)"""
+    entries: List[Annotated[str, Field(min_length=1, max_length=5000)]] = Field(
+        ..., min_length=1, max_length=50, description="Entries to process, each answered independently"
+    )
+    session_id: Optional[str] = Field(None, description="Session to record the entries in")
+    include_context: bool = Field(False, description="Whether to include retrieved context in each result")
+
+
 class FeedbackRequest(BaseModel):
     """Request schema for feedback endpoint"""
     session_id: str = Field(..., description="Session ID")
@@ -53,6 +62,8 @@ class ChatResponse(BaseModel):
     confidence: float = Field(..., ge=0, le=1, description="Classification confidence score")
     is_crisis: bool = Field(False, description="Whether crisis indicators were detected")
     is_final_analysis: bool = Field(False, description="Whether this is the final analysis")
+    status_label: Optional[str] = Field(None, description="Status label, e.g. 'Anxiety (82%)'")
+    show_label: bool = Field(False, description="Whether the status label should be displayed")
     message_count: int = Field(0, description="Number of messages in conversation")
     messages_until_analysis: int = Field(0, description="Messages remaining until analysis")
     context: Optional[List[ContextItem]] = Field(None, description="Retrieved context if requested")
@@ -67,6 +78,8 @@ class ChatResponse(BaseModel):
                 "confidence": 0.0,
                 "is_crisis": False,
                 "is_final_analysis": False,
+                "status_label": None,
+                "show_label": False,
                 "message_count": 2,
                 "messages_until_analysis": 3,
                 "context": None,
@@ -75,6 +88,12 @@ class ChatResponse(BaseModel):
         }
 
 
+class IntakeResponse(BaseModel):
+    """Response schema for bulk intake endpoint"""
+    session_id: str
+    results: List[ChatResponse]
+
+
 class HealthCheckResponse(BaseModel):
     """Response schema for health check endpoint"""
     status: str
@@ -90,6 +109,22 @@ class StatsResponse(BaseModel):
     collection_name: str
     embedding_model: str
     llm_model: str
+    query_cache_hits: int = 0
+    query_cache_misses: int = 0
+
+
+class SessionStatsResponse(BaseModel):
+    """
+    Response schema for session statistics
+    The same for both session backends: message_count covers the retained
+    history, the counters cover every message since the session started
+    """
+    session_id: str
+    message_count: int = Field(..., description="Messages currently retained (at most MAX_MESSAGES_PER_SESSION)")
+    crisis_detections: int = Field(..., description="Messages flagged as crisis since the session started")
+    classifications: Dict[str, int] = Field(..., description="Classification counts since the session started")
+    created_at: str = Field(..., description="ISO-8601 UTC time of the first message")
+    updated_at: str = Field(..., description="ISO-8601 UTC time of the latest message")
 
 
 class ErrorResponse(BaseModel):
@@ -1,21 +1,47 @@
 """
 Session management for maintaining conversation history
 """
-from typing import Dict, Optional, List
-from datetime import datetime, timedelta
+from typing import Dict, Optional, List, Union
+from datetime import datetime, timezone
+from array import array
+import time
 import logging
 from collections import OrderedDict
 
-from models import ChatMessage
+import orjson
+from redis import asyncio as aioredis
+
+from models import Conversation
 
 
 logger = logging.getLogger(__name__)
 
 
+ROLES = ('user', 'assistant')
+ROLE_CODES = {role: code for code, role in enumerate(ROLES)}
+
+
+def _isoformat(ts: float) -> str:
+    """Format an epoch timestamp as an ISO-8601 UTC string"""
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+
 class SessionManager:
     """
     In-memory session manager for conversation history
     Simple version without threading locks to avoid deadlock
+    
+    Sessions are kept in LRU order: the least recently used session is evicted
+    once max_sessions is reached, and sweep_expired drops sessions idle for
+    longer than session_ttl.
+    
+    Messages are stored column-wise (one compact array per field) rather than
+    as one dict per message. Timestamps are epoch floats, formatted only on output.
+    User messages, crisis flags and classifications are running counters, so
+    they cover every message of the session, as in RedisSessionManager.
+    
+    Methods are coroutines with the same signatures as RedisSessionManager's;
+    none of them awaits, so each runs to completion on the event loop thread.
     """
     
     def __init__(
@@ -24,26 +50,47 @@ class SessionManager:
         session_ttl_hours: int = 24,
         max_messages_per_session: int = 100
     ):
-        self.sessions: Dict[str, Dict] = {}
+        self.sessions: "OrderedDict[str, Dict]" = OrderedDict()
         self.max_sessions = max_sessions
-        self.session_ttl = timedelta(hours=session_ttl_hours)
+        self.session_ttl = session_ttl_hours * 3600
         self.max_messages = max_messages_per_session
         
         logger.info(f"Initialized SessionManager with max_sessions={max_sessions}")
     
     def _get_or_create_session(self, session_id: str) -> Dict:
-        """Get session or create new one"""
-        if session_id not in self.sessions:
-            self.sessions[session_id] = {
+        """Get session or create new one, marking it as most recently used"""
+        now = time.time()
+        session = self.sessions.get(session_id)
+        
+        if session is None:
+            if len(self.sessions) >= self.max_sessions:
+                evicted_id, _ = self.sessions.popitem(last=False)
+                logger.debug(f"Evicted least recently used session {evicted_id}")
+            
+            session = {
                 'session_id': session_id,
-                'messages': [],
-                'created_at': datetime.utcnow(),
-                'updated_at': datetime.utcnow(),
+                'roles': bytearray(),
+                'contents': [],
+                'timestamps': array('d'),
+                'user_count': 0,
+                'crisis_detections': 0,
+                'classifications': {},
+                'created_at': now,
+                'updated_at': now,
+                'last_accessed': now,
                 'metadata': {}
             }
-        return self.sessions[session_id]
+            self.sessions[session_id] = session
+        else:
+            self.sessions.move_to_end(session_id)
+            session['last_accessed'] = now
+        
+        return session
+    
+    async def close(self) -> None:
+        """Nothing to release; present so both managers shut down the same way"""
     
-    def add_message(
+    async def add_message(
         self,
         session_id: str,
         role: str,
@@ -53,61 +100,232 @@ class SessionManager:
     ) -> None:
         """Add a message to session history"""
         session = self._get_or_create_session(session_id)
+        now = time.time()
         
-        message = {
-            'role': role,
-            'content': content,
-            'timestamp': datetime.utcnow(),
-            'classification': classification,
-            'is_crisis': is_crisis
-        }
-        
-        session['messages'].append(message)
-        session['updated_at'] = datetime.utcnow()
+        session['roles'].append(ROLE_CODES[role])
+        session['contents'].append(content)
+        session['timestamps'].append(now)
+        session['updated_at'] = now
+        if role == 'user':
+            session['user_count'] += 1
+        if is_crisis:
+            session['crisis_detections'] += 1
+        if classification:
+            counts = session['classifications']
+            counts[classification] = counts.get(classification, 0) + 1
         
-        if len(session['messages']) > self.max_messages:
-            session['messages'] = session['messages'][-self.max_messages:]
+        excess = len(session['contents']) - self.max_messages
+        if excess > 0:
+            for field in ('roles', 'contents', 'timestamps'):
+                del session[field][:excess]
     
-    def get_chat_history(self, session_id: str) -> List[ChatMessage]:
-        """Get chat history as ChatMessage objects"""
+    async def get_chat_history(self, session_id: str) -> List[Dict[str, str]]:
+        """Get chat history as OpenAI-style {role, content} messages"""
         session = self._get_or_create_session(session_id)
         
         return [
-            ChatMessage(role=msg['role'], content=msg['content'])
-            for msg in session['messages']
+            {'role': ROLES[role], 'content': content}
+            for role, content in zip(session['roles'], session['contents'])
         ]
     
-    def clear_session(self, session_id: str) -> bool:
+    async def get_conversation(self, session_id: str) -> Conversation:
+        """
+        Get chat history with the session's user message count
+        The count covers every user message, not only the retained ones
+        """
+        messages = await self.get_chat_history(session_id)
+        return Conversation(messages, self.sessions[session_id]['user_count'])
+    
+    async def clear_session(self, session_id: str) -> bool:
         """Clear a specific session"""
         if session_id in self.sessions:
             del self.sessions[session_id]
             return True
         return False
     
-    def get_session_count(self) -> int:
+    async def get_session_count(self) -> int:
         """Get total number of active sessions"""
         return len(self.sessions)
     
-    def get_session_stats(self, session_id: str) -> Optional[Dict]:
-        """Get statistics for a session"""
+    async def sweep_expired(self) -> int:
+        """
+        Remove sessions idle for longer than session_ttl
+        Scans from the least recently used end and stops at the first live session
+        
+        Returns:
+            Number of sessions removed
+        """
+        cutoff = time.time() - self.session_ttl
+        removed = 0
+        
+        while self.sessions:
+            oldest = next(iter(self.sessions.values()))
+            if oldest['last_accessed'] > cutoff:
+                break
+            self.sessions.popitem(last=False)
+            removed += 1
+        
+        return removed
+    
+    async def get_session_stats(self, session_id: str) -> Optional[Dict]:
+        """
+        Get statistics for a session
+        Counters cover every message of the session, not only the retained ones
+        """
         session = self.sessions.get(session_id)
         if not session:
             return None
         
-        messages = session['messages']
-        crisis_count = sum(1 for m in messages if m.get('is_crisis', False))
+        return {
+            'session_id': session_id,
+            'message_count': len(session['contents']),
+            'crisis_detections': session['crisis_detections'],
+            'classifications': dict(session['classifications']),
+            'created_at': _isoformat(session['created_at']),
+            'updated_at': _isoformat(session['updated_at'])
+        }
+
+
+class RedisSessionManager:
+    """
+    Redis-backed session manager for conversation history
+    Shared across server processes and survives restarts; Redis expires idle sessions
+    Methods are coroutines on redis.asyncio, so Redis round-trips never block the event loop
+    
+    Each session is stored as a LIST of JSON messages under `sess:{id}`
+    plus a HASH of counters under `sess:{id}:stats`
+    """
+    
+    def __init__(
+        self,
+        redis_url: str,
+        session_ttl_hours: int = 24,
+        max_messages_per_session: int = 100,
+        key_prefix: str = "sess"
+    ):
+        self.redis = aioredis.Redis.from_url(redis_url, decode_responses=True)
+        self.session_ttl = session_ttl_hours * 3600
+        self.max_messages = max_messages_per_session
+        self.key_prefix = key_prefix
         
-        classifications = {}
-        for msg in messages:
-            if msg.get('classification'):
-                cls = msg['classification']
-                classifications[cls] = classifications.get(cls, 0) + 1
+        logger.info(f"Initialized RedisSessionManager at {redis_url}")
+    
+    async def close(self) -> None:
+        """Close the Redis connection pool"""
+        await self.redis.aclose()
+    
+    def _messages_key(self, session_id: str) -> str:
+        return f"{self.key_prefix}:{session_id}"
+    
+    def _stats_key(self, session_id: str) -> str:
+        return f"{self.key_prefix}:{session_id}:stats"
+    
+    async def add_message(
+        self,
+        session_id: str,
+        role: str,
+        content: str,
+        classification: Optional[str] = None,
+        is_crisis: bool = False
+    ) -> None:
+        """Add a message to session history"""
+        messages_key = self._messages_key(session_id)
+        stats_key = self._stats_key(session_id)
+        now = time.time()
+        
+        message = {
+            'role': role,
+            'content': content,
+            'timestamp': now,
+            'classification': classification,
+            'is_crisis': is_crisis
+        }
+        
+        pipe = self.redis.pipeline()
+        pipe.rpush(messages_key, orjson.dumps(message))
+        pipe.ltrim(messages_key, -self.max_messages, -1)
+        pipe.hsetnx(stats_key, 'created_at', now)
+        pipe.hset(stats_key, 'updated_at', now)
+        if role == 'user':
+            pipe.hincrby(stats_key, 'user_count', 1)
+        if is_crisis:
+            pipe.hincrby(stats_key, 'crisis_detections', 1)
+        if classification:
+            pipe.hincrby(stats_key, f'cls:{classification}', 1)
+        pipe.expire(messages_key, self.session_ttl)
+        pipe.expire(stats_key, self.session_ttl)
+        await pipe.execute()
+    
+    async def get_chat_history(self, session_id: str) -> List[Dict[str, str]]:
+        """Get chat history as OpenAI-style {role, content} messages"""
+        raw_messages = await self.redis.lrange(self._messages_key(session_id), 0, -1)
+        
+        messages = [orjson.loads(raw) for raw in raw_messages]
+        return [
+            {'role': msg['role'], 'content': msg['content']}
+            for msg in messages
+        ]
+    
+    async def get_conversation(self, session_id: str) -> Conversation:
+        """
+        Get chat history with the session's user message count
+        The count covers every user message, not only the retained ones
+        """
+        pipe = self.redis.pipeline()
+        pipe.lrange(self._messages_key(session_id), 0, -1)
+        pipe.hget(self._stats_key(session_id), 'user_count')
+        raw_messages, user_count = await pipe.execute()
+        
+        messages = [orjson.loads(raw) for raw in raw_messages]
+        return Conversation(
+            [{'role': msg['role'], 'content': msg['content']} for msg in messages],
+            int(user_count or 0)
+        )
+    
+    async def clear_session(self, session_id: str) -> bool:
+        """Clear a specific session"""
+        deleted = await self.redis.delete(self._messages_key(session_id), self._stats_key(session_id))
+        return deleted > 0
+    
+    async def get_session_count(self) -> int:
+        """Get total number of active sessions"""
+        count = 0
+        async for _ in self.redis.scan_iter(match=f"{self.key_prefix}:*:stats"):
+            count += 1
+        return count
+    
+    async def sweep_expired(self) -> int:
+        """Redis expires idle sessions itself via key TTLs"""
+        return 0
+    
+    async def get_session_stats(self, session_id: str) -> Optional[Dict]:
+        """
+        Get statistics for a session
+        Counters cover every message of the session, not only the retained ones
+        """
+        pipe = self.redis.pipeline()
+        pipe.hgetall(self._stats_key(session_id))
+        pipe.llen(self._messages_key(session_id))
+        stats, message_count = await pipe.execute()
+        
+        if not stats:
+            return None
+        
+        classifications = {
+            field[len('cls:'):]: int(count)
+            for field, count in stats.items()
+            if field.startswith('cls:')
+        }
         
         return {
             'session_id': session_id,
-            'message_count': len(messages),
-            'crisis_detections': crisis_count,
+            'message_count': message_count,
+            'crisis_detections': int(stats.get('crisis_detections', 0)),
             'classifications': classifications,
-            'created_at': session['created_at'].isoformat(),
-            'updated_at': session['updated_at'].isoformat()
-        }
\ No newline at end of file
+            'created_at': _isoformat(float(stats['created_at'])),
+            'updated_at': _isoformat(float(stats['updated_at']))
+        }
+
+
+# Either backend; both expose the same coroutine methods
+SessionStore = Union[SessionManager, RedisSessionManager]
@@ -1,3 +1,3 @@
-from .settings import settings, MENTAL_HEALTH_LABELS, SYSTEM_PROMPT, CLASSIFICATION_PROMPT
+from .settings import settings, MENTAL_HEALTH_LABELS, CRISIS_KEYWORDS, SYSTEM_PROMPT, CLASSIFICATION_PROMPT
 
-__all__ = ["settings", "MENTAL_HEALTH_LABELS", "SYSTEM_PROMPT", "CLASSIFICATION_PROMPT"]
+__all__ = ["settings", "MENTAL_HEALTH_LABELS", "CRISIS_KEYWORDS", "SYSTEM_PROMPT", "CLASSIFICATION_PROMPT"]
@@ -4,7 +4,7 @@ Configuration settings for Mental Health Chatbot
 import os
 from pathlib import Path
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Optional, Literal
 
 
 class Settings(BaseSettings):
@@ -13,16 +13,43 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str = ""
     
     EMBEDDING_MODEL: str = "text-embedding-3-small"
+    EMBEDDING_DIMENSIONS: int = 512
+    EMBEDDING_CACHE_SIZE: int = 10000
+    EMBEDDING_COALESCE_MS: int = 8
+    EMBEDDING_STORE_PATH: str = "./data/embedding_cache.sqlite3"
     LLM_MODEL: str = "gpt-4o-mini"
     LLM_TEMPERATURE: float = 0.7
     LLM_MAX_TOKENS: int = 1024
+    OPENAI_TIMEOUT_SECONDS: float = 30.0
+    OPENAI_MAX_CONNECTIONS: int = 200
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 100
 
     CHROMA_PERSIST_DIRECTORY: str = "./data/chroma_db"
     COLLECTION_NAME: str = "mental_health_knowledge"
     
     RETRIEVAL_TOP_K: int = 5
+    ANN_PROFILE: Literal["fast", "balanced", "recall-max"] = "balanced"
+    HNSW_M: int = 32
+    HNSW_CONSTRUCTION_EF: int = 100
     SIMILARITY_THRESHOLD: float = 0.7
     
+    QUERY_CACHE_SIZE: int = 1024
+    QUERY_CACHE_TTL_SECONDS: int = 300
+    RESPONSE_CACHE_SIZE: int = 1024
+    RESPONSE_CACHE_TTL_SECONDS: int = 600
+    SEMANTIC_CACHE_SIZE: int = 512
+    SEMANTIC_CACHE_THRESHOLD: float = 0.95
+    RESULT_CACHE_SIZE: int = 1024
+    RESULT_CACHE_THRESHOLD: float = 0.97
+    SEMANTIC_CACHE_QUANTIZE: bool = False
+    
+    BATCH_MAX_SIZE: int = 16
+    BATCH_MAX_WAIT_MS: int = 15
+    
+    REDIS_URL: str = ""
+    SESSION_TTL_HOURS: int = 24
+    MAX_MESSAGES_PER_SESSION: int = 100
+    
     CHUNK_SIZE: int = 500
     CHUNK_OVERLAP: int = 50
     
@@ -52,6 +79,15 @@ MENTAL_HEALTH_LABELS = [
     "Suicidal"
 ]
 
+CRISIS_KEYWORDS = [
+    'suicide', 'kill myself', 'end my life', 'want to die',
+    'self-harm', 'self-harming', 'hurt myself', 'cutting',
+    'overdose', 'overdosed', 'overdosing',
+    'no reason to live', 'better off dead', 'ending it all',
+    'bunuh diri', 'membunuh diri', 'mau mati', 'ingin mati', 'tidak ingin hidup',
+    'menyakiti diri', 'mengakhiri hidup'
+]
+
 SYSTEM_PROMPT = """You are a compassionate and professional mental health support chatbot. 
 Your role is to:
 1. Listen empathetically to users' concerns
@@ -1,4 +1,4 @@
 """Models package"""
-from .rag_chain import MentalHealthRAGChain, ChatMessage, RAGResponse
+from .rag_chain import MentalHealthRAGChain, ChatMessage, Conversation, RAGResponse, normalize_message
 
-__all__ = ['MentalHealthRAGChain', 'ChatMessage', 'RAGResponse']
\ No newline at end of file
+__all__ = ['MentalHealthRAGChain', 'ChatMessage', 'Conversation', 'RAGResponse', 'normalize_message']
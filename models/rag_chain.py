@@ -4,26 +4,75 @@ Logic: Natural flowing conversation - like talking to a supportive friend
 Status label shown separately, NOT in the chat response
 All prompts in English
 """
-from openai import OpenAI
-from typing import List, Dict, Optional, Tuple
+from openai import AsyncOpenAI
+from typing import AsyncIterator, List, Dict, Optional, Tuple, Union
+import asyncio
+import hashlib
+import json
 import logging
-from dataclasses import dataclass
+import math
+import re
+from dataclasses import dataclass, field
 
 from utils.vector_store import VectorStore
-from config import SYSTEM_PROMPT, CLASSIFICATION_PROMPT, MENTAL_HEALTH_LABELS
+from utils.crisis_patterns import compile_crisis_regex, normalize_message
+from config import SYSTEM_PROMPT, CLASSIFICATION_PROMPT, MENTAL_HEALTH_LABELS, CRISIS_KEYWORDS
 
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class ChatMessage:
     """Represents a chat message"""
     role: str
     content: str
 
 
-@dataclass
+@dataclass(slots=True)
+class Conversation:
+    """
+    Chat history as OpenAI-style {role, content} messages, with a running
+    count of user messages so turns never rescan the history to count them
+    """
+    messages: List[Dict[str, str]] = field(default_factory=list)
+    user_count: int = 0
+    
+    @classmethod
+    def from_messages(cls, messages: List[Dict[str, str]]) -> "Conversation":
+        """Wrap a plain message list, counting its user messages once"""
+        return cls(list(messages), sum(1 for m in messages if m["role"] == "user"))
+    
+    def append_user(self, content: str) -> None:
+        self.messages.append({"role": "user", "content": content})
+        self.user_count += 1
+    
+    def append_assistant(self, content: str) -> None:
+        self.messages.append({"role": "assistant", "content": content})
+    
+    def recent_user_texts(self, limit: Optional[int] = None) -> List[str]:
+        """Texts of the latest user messages, oldest first; scans back only as far as needed"""
+        texts = []
+        for message in reversed(self.messages):
+            if limit is not None and len(texts) == limit:
+                break
+            if message["role"] == "user":
+                texts.append(message["content"])
+        texts.reverse()
+        return texts
+
+
+ChatHistory = Union[Conversation, List[Dict[str, str]]]
+
+
+def as_conversation(chat_history: Optional[ChatHistory]) -> Conversation:
+    """Accept a Conversation or a plain message list"""
+    if isinstance(chat_history, Conversation):
+        return chat_history
+    return Conversation.from_messages(chat_history or [])
+
+
+@dataclass(slots=True)
 class RAGResponse:
     """Response from the RAG chain"""
     answer: str
@@ -38,6 +87,144 @@ class RAGResponse:
 
 CONFIDENCE_THRESHOLD = 0.75
 MIN_MESSAGES_FOR_LABEL = 3  
+CLASSIFICATION_MAX_TOKENS = 5
+RESPONSE_CACHE_HISTORY_MESSAGES = 3
+RECENT_QUERY_MESSAGES = 2
+RECENT_QUERY_TOP_K = 2
+
+# Knowledge injected into the prompt is capped by document count and an
+# approximate token budget (about 4 characters per token for English text)
+CONTEXT_MAX_DOCS = 3
+# Slots within CONTEXT_MAX_DOCS kept for documents found via earlier messages
+CONTEXT_RECENT_DOCS = 1
+CONTEXT_TOKEN_BUDGET = 300
+CHARS_PER_TOKEN = 4
+MIN_CONTEXT_CHARS = 40 * CHARS_PER_TOKEN
+FALLBACK_REPLY = "I'm here for you. Want to tell me what's on your mind? 😊"
+
+VALID_CLASSES = ["Anxiety", "Depression", "Stress", "Bipolar", "Personality Disorder", "Suicidal", "Normal"]
+LABEL_LOOKUP = {label.lower(): label for label in VALID_CLASSES}
+
+CLASSIFICATION_PATTERN = re.compile(r"^\s*CLASSIFICATION:\s*(.+)$", re.IGNORECASE | re.MULTILINE)
+CONFIDENCE_PATTERN = re.compile(r"^\s*CONFIDENCE:\s*([0-9]*\.?[0-9]+)", re.IGNORECASE | re.MULTILINE)
+
+REPLY_WITH_CLASSIFICATION_SCHEMA = {
+    "name": "reply_with_classification",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "reply": {"type": "string"},
+            "classification": {"type": "string", "enum": VALID_CLASSES},
+            "confidence": {"type": "number"}
+        },
+        "required": ["reply", "classification", "confidence"],
+        "additionalProperties": False
+    }
+}
+
+
+# Prompts are built once at import; only per-turn values are formatted in
+
+SYSTEM_MESSAGE = {"role": "system", "content": """You are MindCare, a warm and supportive conversational companion.
+
+=== HOW TO COMMUNICATE ===
+- Talk like a close friend who listens, NOT like a psychologist or therapist
+- Keep responses short and natural (2-3 sentences)
+- Use casual but respectful language
+- Ask follow-up questions to show genuine interest
+- Validate feelings without judgment
+- Match the user's language style and energy
+
+=== USING THE KNOWLEDGE BASE ===
+- You have access to a mental health knowledge base
+- Use the information from the knowledge base to understand the user's situation
+- If there's relevant information in the knowledge base, use it as reference for your response
+- Deliver information naturally, DO NOT copy-paste or sound robotic
+- Weave knowledge naturally into supportive conversation
+
+=== WHAT NOT TO DO ===
+- DO NOT mention diagnoses (anxiety, depression, stress, etc.)
+- DO NOT say "based on our conversation..." or "according to the database..."
+- DO NOT give disclaimers about seeking professional help
+- DO NOT be overly formal or clinical
+- DO NOT lecture or give long unsolicited advice
+- DO NOT sound like a therapist or counselor
+
+=== GOOD RESPONSE EXAMPLES ===
+User: "I'm feeling really sad today"
+Response: "Hey, I'm here for you. Want to talk about what's making you feel this way?"
+
+User: "I can't sleep lately"
+Response: "Ugh, that's rough. Is there something on your mind keeping you up?"
+
+User: "Work is so overwhelming"
+Response: "That sounds exhausting. Are the deadlines piling up or is it something else?"
+
+User: "I just need someone to talk to"
+Response: "I'm right here. What's going on? You can share anything."
+
+Remember: You're a FRIEND, not a doctor. Focus on LISTENING and BEING PRESENT."""}
+
+CRISIS_SYSTEM_MESSAGE = {"role": "system", "content": """You are a caring friend. The user may be in crisis.
+
+YOUR PRIORITIES:
+1. Show genuine care and concern
+2. Validate their feelings without judgment
+3. Provide crisis resources: 
+   - National Suicide Prevention Lifeline: 988 (US)
+   - Crisis Text Line: Text HOME to 741741
+   - International: https://findahelpline.com
+4. Encourage them to reach out to someone they trust
+5. Stay with them in conversation
+
+DO NOT lecture. DO NOT give generic advice. Just be present and caring."""}
+
+KNOWLEDGE_PROMPT_TEMPLATE = """
+=== KNOWLEDGE BASE REFERENCE ===
+Use the following information from our mental health database to better understand and respond to the user.
+DO NOT copy-paste this information. Use it naturally in your response.
+
+{context}
+
+Remember: Reference this knowledge naturally without mentioning "database" or "knowledge base" to the user.
+"""
+
+OUTPUT_FORMAT_MESSAGE = {"role": "system", "content": """=== OUTPUT FORMAT ===
+Reply with a JSON object:
+- "reply": your message to the user, following all the guidance above
+- "classification": the user's mental health state judged from ALL their messages in this conversation, compared with the knowledge base patterns. One of: Anxiety, Depression, Stress, Bipolar, Personality Disorder, Suicidal, Normal
+- "confidence": 0.0-1.0, how closely the user's messages match those patterns
+
+The classification is never shown inside the reply."""}
+
+CLASSIFIER_SYSTEM_MESSAGE = {"role": "system", "content": "You are a mental health classifier. Use the reference database patterns to accurately classify user messages. Compare user expressions with database patterns to determine the classification. Output only the category name."}
+
+CLASSIFICATION_PROMPT_TEMPLATE = """You are a mental health classifier. Analyze the user messages and determine their mental health state.
+
+=== USER MESSAGES ===
+{conversation_text}
+
+=== REFERENCE PATTERNS FROM MENTAL HEALTH DATABASE ===
+{context}
+
+=== CLASSIFICATION TASK ===
+Based on the user messages AND comparing them with the reference patterns from the database above, classify into ONE of these categories:
+
+- Anxiety (signs: excessive worry, panic, nervousness, fear of future, racing thoughts)
+- Depression (signs: persistent sadness, hopelessness, no energy, loss of interest, emptiness)
+- Stress (signs: overwhelmed, pressure, burnout, tension, inability to cope)
+- Bipolar (signs: mood swings, extreme highs and lows, manic episodes)
+- Personality Disorder (signs: identity issues, unstable relationships, emotional dysregulation)
+- Suicidal (signs: thoughts of death, self-harm, wanting to end life)
+- Normal (no significant mental health concerns, just casual conversation)
+
+=== INSTRUCTIONS ===
+1. Compare the user's language patterns with the reference patterns from the database
+2. Look for matching symptoms, emotions, and expressions
+3. Pick the category whose patterns match the user messages most closely
+
+Reply with ONLY the category name, nothing else."""
 
 
 class MentalHealthRAGChain:
@@ -45,132 +232,207 @@ class MentalHealthRAGChain:
     def __init__(
         self,
         vector_store: VectorStore,
-        openai_api_key: str,
+        openai_client: AsyncOpenAI,
         llm_model: str = "gpt-4o-mini",
         temperature: float = 0.7,
         max_tokens: int = 512,
-        retrieval_top_k: int = 5
+        retrieval_top_k: int = 5,
+        query_cache=None,
+        response_cache=None,
+        semantic_cache=None
     ):
         self.vector_store = vector_store
-        self.openai_client = OpenAI(api_key=openai_api_key)
+        self.query_cache = query_cache
+        self.response_cache = response_cache
+        self.semantic_cache = semantic_cache
+        self.openai_client = openai_client
         self.llm_model = llm_model
         self.temperature = temperature
         self.max_tokens = max_tokens
         self.retrieval_top_k = retrieval_top_k
         
-        self.crisis_keywords = [
-            'suicide', 'kill myself', 'end my life', 'want to die',
-            'self-harm', 'hurt myself', 'cutting', 'overdose',
-            'no reason to live', 'better off dead', 'ending it all',
-            'bunuh diri', 'mau mati', 'ingin mati', 'tidak ingin hidup',
-            'menyakiti diri', 'mengakhiri hidup'
-        ]
+        self.crisis_keywords = CRISIS_KEYWORDS
+        
+        # Same patterns as the API's CrisisFilter, so both paths agree on every message
+        self._crisis_pattern = compile_crisis_regex(self.crisis_keywords)
         
         logger.info("Initialized Mental Health RAG Chain")
     
-    def _check_crisis(self, text: str) -> bool:
-        """Check for crisis keywords"""
-        text_lower = text.lower()
-        return any(keyword in text_lower for keyword in self.crisis_keywords)
+    def _check_crisis(self, normalized: str) -> bool:
+        """Check normalized message text for crisis keywords, as CrisisFilter does"""
+        return self._crisis_pattern.search(normalized) is not None
     
-    def _retrieve_context(self, query: str) -> List[Dict]:
-        """Retrieve relevant context from vector store"""
-        try:
-            results = self.vector_store.search(query=query, top_k=self.retrieval_top_k)
-            return results
-        except Exception as e:
-            logger.error(f"Error retrieving context: {e}")
-            return []
+    def _cache_key(self, normalized: str) -> Optional[str]:
+        """Retrieval cache key for a normalized query, or None when caching is disabled"""
+        if self.query_cache is None:
+            return None
+        return self.query_cache.key_for(normalized, self.retrieval_top_k)
+    
+    async def _retrieve_context(
+        self,
+        query: str,
+        normalized: str,
+        conversation: Conversation
+    ) -> Tuple[List[Dict], Optional[List[float]]]:
+        """
+        Retrieve relevant context from vector store
+        Returns: (results, query embedding or None when served from the retrieval cache)
+        """
+        retrieved, vectors = await self._retrieve_conversation_context([query], [normalized], [conversation])
+        return retrieved[0], vectors[0]
+    
+    async def _retrieve_conversation_context(
+        self,
+        queries: List[str],
+        normalized: List[str],
+        conversations: List[Conversation]
+    ) -> Tuple[List[List[Dict]], List[Optional[List[float]]]]:
+        """
+        Retrieve context for each message and its latest earlier user messages
+        in one batched embedding request and vector search
+        Earlier messages were usually the current message of a previous turn, so
+        their results mostly come from the retrieval cache; each adds its top
+        RECENT_QUERY_TOP_K documents not already retrieved for the message.
+        These are placed ahead of the message's lower-ranked documents so the
+        last CONTEXT_RECENT_DOCS prompt slots go to the conversation
+        """
+        all_queries = list(queries)
+        all_normalized = list(normalized)
+        owners = []
+        for i, conversation in enumerate(conversations):
+            for text in reversed(conversation.recent_user_texts(RECENT_QUERY_MESSAGES)):
+                all_queries.append(text)
+                all_normalized.append(normalize_message(text))
+                owners.append(i)
+        
+        retrieved, vectors = await self._retrieve_context_batch(all_queries, all_normalized)
+        
+        current = retrieved[:len(queries)]
+        extras: List[List[Dict]] = [[] for _ in queries]
+        seen = [{doc.get('content') for doc in results} for results in current]
+        for owner, results in zip(owners, retrieved[len(queries):]):
+            extra = [doc for doc in results if doc.get('content') not in seen[owner]][:RECENT_QUERY_TOP_K]
+            extras[owner].extend(extra)
+            seen[owner].update(doc.get('content') for doc in extra)
+        
+        split = CONTEXT_MAX_DOCS - CONTEXT_RECENT_DOCS
+        merged = [
+            results[:split] + extra + results[split:]
+            for results, extra in zip(current, extras)
+        ]
+        return merged, vectors[:len(queries)]
+    
+    async def _retrieve_context_batch(
+        self,
+        queries: List[str],
+        normalized: List[str]
+    ) -> Tuple[List[List[Dict]], List[Optional[List[float]]]]:
+        """
+        Retrieve context for several queries with a single embedding request
+        The query embeddings are returned so later steps do not embed again
+        """
+        keys = [self._cache_key(n) for n in normalized]
+        retrieved: List[Optional[List[Dict]]] = [
+            self.query_cache.get(key) if key else None for key in keys
+        ]
+        vectors: List[Optional[List[float]]] = [None] * len(queries)
+        
+        missing = [i for i, results in enumerate(retrieved) if results is None]
+        if missing:
+            try:
+                embedded = await self.vector_store.aembed([queries[i] for i in missing])
+                fetched = await asyncio.to_thread(
+                    self.vector_store.search_by_vectors,
+                    embedded,
+                    top_k=self.retrieval_top_k
+                )
+            except Exception as e:
+                logger.error(f"Error retrieving context: {e}")
+                embedded = [None] * len(missing)
+                fetched = [[] for _ in missing]
+            
+            for i, vector, results in zip(missing, embedded, fetched):
+                retrieved[i] = results
+                vectors[i] = vector
+                if keys[i] and results:
+                    self.query_cache.set(keys[i], results)
+        
+        return retrieved, vectors
     
     def _format_context(self, retrieved_docs: List[Dict]) -> str:
-        """Format retrieved documents into context string"""
+        """
+        Format retrieved documents into context string
+        Documents are taken in retrieval order, skipping duplicates, until
+        CONTEXT_MAX_DOCS or CONTEXT_TOKEN_BUDGET is reached; a document that
+        overflows the budget is cut at a word boundary
+        """
         if not retrieved_docs:
             return ""
         
         parts = []
-        for i, doc in enumerate(retrieved_docs, 1):
+        seen = set()
+        budget = CONTEXT_TOKEN_BUDGET * CHARS_PER_TOKEN
+        for doc in retrieved_docs:
             content = doc.get('content', '')
+            key = normalize_message(content)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            
+            if len(content) > budget:
+                content = content[:budget].rsplit(" ", 1)[0] + "..."
+            budget -= len(content)
+            
             metadata = doc.get('metadata', {})
             source = metadata.get('source', 'unknown')
             status = metadata.get('mental_health_status', '')
+            i = len(parts) + 1
             
             if status:
                 parts.append(f"[{i}] ({source} - {status}) {content}")
             else:
                 parts.append(f"[{i}] ({source}) {content}")
+            
+            if len(parts) == CONTEXT_MAX_DOCS or budget < MIN_CONTEXT_CHARS:
+                break
         
         return "\n".join(parts)
     
-    def _analyze_mental_state(self, chat_history: List[ChatMessage], current_message: str, context: str = "") -> Tuple[str, float]:
+    async def _analyze_mental_state(self, user_texts: List[str], current_message: str, context: str = "") -> Tuple[str, float]:
         """
         Analyze mental state from conversation using dataset as reference
         Returns: (classification, confidence)
         """
         try:
-            all_user_msgs = [m.content for m in chat_history if m.role == "user"]
-            all_user_msgs.append(current_message)
-            
-            conversation_text = "\n".join([f"- {msg}" for msg in all_user_msgs])
+            conversation_text = "\n".join([
+                *(f"- {text}" for text in user_texts),
+                f"- {current_message}"
+            ])
             
-            prompt = f"""You are a mental health classifier. Analyze the user messages and determine their mental health state.
-
-=== USER MESSAGES ===
-{conversation_text}
-
-=== REFERENCE PATTERNS FROM MENTAL HEALTH DATABASE ===
-{context if context else "No specific reference found."}
-
-=== CLASSIFICATION TASK ===
-Based on the user messages AND comparing them with the reference patterns from the database above, classify into ONE of these categories:
-
-- Anxiety (signs: excessive worry, panic, nervousness, fear of future, racing thoughts)
-- Depression (signs: persistent sadness, hopelessness, no energy, loss of interest, emptiness)
-- Stress (signs: overwhelmed, pressure, burnout, tension, inability to cope)
-- Bipolar (signs: mood swings, extreme highs and lows, manic episodes)
-- Personality Disorder (signs: identity issues, unstable relationships, emotional dysregulation)
-- Suicidal (signs: thoughts of death, self-harm, wanting to end life)
-- Normal (no significant mental health concerns, just casual conversation)
-
-=== INSTRUCTIONS ===
-1. Compare the user's language patterns with the reference patterns from the database
-2. Look for matching symptoms, emotions, and expressions
-3. Rate your confidence from 0.0 to 1.0 based on how closely the user messages match the database patterns
-4. Higher confidence = stronger match with database patterns
-
-Reply ONLY in this exact format:
-CLASSIFICATION: [category]
-CONFIDENCE: [0.0-1.0]"""
+            prompt = CLASSIFICATION_PROMPT_TEMPLATE.format(
+                conversation_text=conversation_text,
+                context=context or "No specific reference found."
+            )
 
-            response = self.openai_client.chat.completions.create(
+            response = await self.openai_client.chat.completions.create(
                 model=self.llm_model,
                 messages=[
-                    {"role": "system", "content": "You are a mental health classifier. Use the reference database patterns to accurately classify user messages. Compare user expressions with database patterns to determine classification and confidence. Output only the requested format."},
+                    CLASSIFIER_SYSTEM_MESSAGE,
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.1,
-                max_tokens=50
+                max_tokens=CLASSIFICATION_MAX_TOKENS,
+                logprobs=True
             )
+            self._log_usage(response, "classification")
             
-            result = response.choices[0].message.content.strip()
-            
-            classification = "Normal"
-            confidence = 0.5
+            choice = response.choices[0]
+            classification, confidence = self._parse_classification(choice.message.content.strip())
             
-            for line in result.split('\n'):
-                if line.startswith('CLASSIFICATION:'):
-                    raw_class = line.replace('CLASSIFICATION:', '').strip()
-                    valid_classes = ["Anxiety", "Depression", "Stress", "Bipolar", "Personality Disorder", "Suicidal", "Normal"]
-                    for vc in valid_classes:
-                        if vc.lower() in raw_class.lower():
-                            classification = vc
-                            break
-                elif line.startswith('CONFIDENCE:'):
-                    try:
-                        conf_str = line.replace('CONFIDENCE:', '').strip()
-                        confidence = float(conf_str)
-                        confidence = max(0.0, min(1.0, confidence))
-                    except:
-                        confidence = 0.5
+            # The model's probability for the label's first token is the confidence
+            logprobs = getattr(choice, "logprobs", None)
+            if logprobs and logprobs.content:
+                confidence = math.exp(logprobs.content[0].logprob)
             
             return classification, confidence
             
@@ -178,133 +440,394 @@ CONFIDENCE: [0.0-1.0]"""
             logger.error(f"Classification error: {e}")
             return "Normal", 0.3
     
-    def _generate_response(
+    @staticmethod
+    def _parse_classification(result: str) -> Tuple[str, float]:
+        """
+        Parse a bare label or CLASSIFICATION/CONFIDENCE lines,
+        defaulting to Normal at 0.5
+        """
+        confidence = 0.5
+
+        match = CLASSIFICATION_PATTERN.search(result)
+        raw_class = (match.group(1) if match else result).strip().lower()
+        classification = LABEL_LOOKUP.get(raw_class) or next(
+            (label for key, label in LABEL_LOOKUP.items() if key in raw_class),
+            "Normal"
+        )
+
+        match = CONFIDENCE_PATTERN.search(result)
+        if match:
+            confidence = max(0.0, min(1.0, float(match.group(1))))
+
+        return classification, confidence
+
+    def _build_generation_messages(
+        self,
+        user_message: str,
+        context: str,
+        chat_history: List[Dict[str, str]],
+        is_crisis: bool = False
+    ) -> List[Dict[str, str]]:
+        """Build the chat completion messages for a friendly reply"""
+        system = CRISIS_SYSTEM_MESSAGE if is_crisis else SYSTEM_MESSAGE
+
+        knowledge = []
+        if context:
+            knowledge_prompt = KNOWLEDGE_PROMPT_TEMPLATE.format(context=context)
+            knowledge = [{"role": "system", "content": knowledge_prompt}]
+        
+        # Static content first and per-turn content last, so the system prompt and
+        # earlier turns form a stable prefix for OpenAI's automatic prompt caching
+        return [
+            system,
+            *chat_history[-10:],
+            *knowledge,
+            {"role": "user", "content": user_message}
+        ]
+    
+    def _log_usage(self, response, call: str) -> None:
+        """Log prompt tokens and how many were served from OpenAI's prompt cache"""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", 0) or 0
+        logger.debug(f"{call}: {usage.prompt_tokens} prompt tokens, {cached} cached")
+    
+    async def _generate_response(
         self, 
         user_message: str, 
         context: str, 
-        chat_history: List[ChatMessage],
+        chat_history: List[Dict[str, str]],
         is_crisis: bool = False
     ) -> str:
         """Generate natural, friendly chatbot response using knowledge base"""
         try:
-            if is_crisis:
-                system = """You are a caring friend. The user may be in crisis.
-
-YOUR PRIORITIES:
-1. Show genuine care and concern
-2. Validate their feelings without judgment
-3. Provide crisis resources: 
-   - National Suicide Prevention Lifeline: 988 (US)
-   - Crisis Text Line: Text HOME to 741741
-   - International: https://findahelpline.com
-4. Encourage them to reach out to someone they trust
-5. Stay with them in conversation
-
-DO NOT lecture. DO NOT give generic advice. Just be present and caring."""
-
-            else:
-                system = """You are MindCare, a warm and supportive conversational companion.
-
-=== HOW TO COMMUNICATE ===
-- Talk like a close friend who listens, NOT like a psychologist or therapist
-- Keep responses short and natural (2-3 sentences)
-- Use casual but respectful language
-- Ask follow-up questions to show genuine interest
-- Validate feelings without judgment
-- Match the user's language style and energy
-
-=== USING THE KNOWLEDGE BASE ===
-- You have access to a mental health knowledge base
-- Use the information from the knowledge base to understand the user's situation
-- If there's relevant information in the knowledge base, use it as reference for your response
-- Deliver information naturally, DO NOT copy-paste or sound robotic
-- Weave knowledge naturally into supportive conversation
-
-=== WHAT NOT TO DO ===
-- DO NOT mention diagnoses (anxiety, depression, stress, etc.)
-- DO NOT say "based on our conversation..." or "according to the database..."
-- DO NOT give disclaimers about seeking professional help
-- DO NOT be overly formal or clinical
-- DO NOT lecture or give long unsolicited advice
-- DO NOT sound like a therapist or counselor
-
-=== GOOD RESPONSE EXAMPLES ===
-User: "I'm feeling really sad today"
-Response: "Hey, I'm here for you. Want to talk about what's making you feel this way?"
-
-User: "I can't sleep lately"
-Response: "Ugh, that's rough. Is there something on your mind keeping you up?"
-
-User: "Work is so overwhelming"
-Response: "That sounds exhausting. Are the deadlines piling up or is it something else?"
-
-User: "I just need someone to talk to"
-Response: "I'm right here. What's going on? You can share anything."
-
-Remember: You're a FRIEND, not a doctor. Focus on LISTENING and BEING PRESENT."""
-
-            messages = [{"role": "system", "content": system}]
+            messages = self._build_generation_messages(user_message, context, chat_history, is_crisis)
             
-            if context:
-                knowledge_prompt = f"""
-=== KNOWLEDGE BASE REFERENCE ===
-Use the following information from our mental health database to better understand and respond to the user.
-DO NOT copy-paste this information. Use it naturally in your response.
-
-{context}
-
-Remember: Reference this knowledge naturally without mentioning "database" or "knowledge base" to the user.
-"""
-                messages.append({"role": "system", "content": knowledge_prompt})
-            
-            for msg in chat_history[-10:]:
-                messages.append({"role": msg.role, "content": msg.content})
-            
-            messages.append({"role": "user", "content": user_message})
-            
-            response = self.openai_client.chat.completions.create(
+            response = await self.openai_client.chat.completions.create(
                 model=self.llm_model,
                 messages=messages,
                 temperature=self.temperature,
                 max_tokens=self.max_tokens
             )
+            self._log_usage(response, "generation")
             
             return response.choices[0].message.content
             
         except Exception as e:
             logger.error(f"Generation error: {e}")
-            return "I'm here for you. Want to tell me what's on your mind? 😊"
+            return FALLBACK_REPLY
     
-    def chat(
+    async def _generate_with_classification(
         self,
         user_message: str,
-        chat_history: Optional[List[ChatMessage]] = None
+        context: str,
+        chat_history: List[Dict[str, str]]
+    ) -> Optional[Tuple[str, str, float]]:
+        """
+        Generate the reply and classify the user in one structured-output call
+        Returns: (answer, classification, confidence), or None if the call or parsing fails
+        """
+        try:
+            messages = self._build_generation_messages(user_message, context, chat_history)
+            messages.insert(1, OUTPUT_FORMAT_MESSAGE)
+            
+            response = await self.openai_client.chat.completions.create(
+                model=self.llm_model,
+                messages=messages,
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+                response_format={"type": "json_schema", "json_schema": REPLY_WITH_CLASSIFICATION_SCHEMA}
+            )
+            self._log_usage(response, "reply+classification")
+            
+            result = json.loads(response.choices[0].message.content)
+            classification = result["classification"]
+            if classification not in VALID_CLASSES:
+                raise ValueError(f"Unknown classification {classification!r}")
+            confidence = max(0.0, min(1.0, float(result["confidence"])))
+            
+            return result["reply"], classification, confidence
+            
+        except Exception as e:
+            logger.warning(f"Combined reply/classification failed, falling back to two calls: {e}")
+            return None
+    
+    async def _stream_response(
+        self,
+        user_message: str,
+        context: str,
+        chat_history: List[Dict[str, str]],
+        is_crisis: bool = False
+    ) -> AsyncIterator[str]:
+        """Stream the friendly reply as text chunks"""
+        messages = self._build_generation_messages(user_message, context, chat_history, is_crisis)
+        
+        stream = await self.openai_client.chat.completions.create(
+            model=self.llm_model,
+            messages=messages,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            stream=True
+        )
+        
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    def _response_cache_key(self, normalized: str, chat_history: List[Dict[str, str]]) -> Optional[str]:
+        """Reply cache key from the normalized message and the latest history turns"""
+        if self.response_cache is None:
+            return None
+        tail = "\x1f".join(
+            f"{m['role']}:{m['content']}" for m in chat_history[-RESPONSE_CACHE_HISTORY_MESSAGES:]
+        )
+        return hashlib.sha256(f"{normalized}|{tail}".encode()).hexdigest()
+    
+    async def _query_vector(self, user_message: str) -> Optional[List[float]]:
+        """Query embedding, normally served from the vector store's embedding cache"""
+        try:
+            return (await self.vector_store.aembed([user_message]))[0]
+        except Exception as e:
+            logger.error(f"Error embedding query for semantic cache: {e}")
+            return None
+    
+    async def prefetch_embedding(self, user_message: str) -> None:
+        """
+        Embed a message before chat is called, e.g. while its session loads
+        The vector lands in the vector store's embedding cache for retrieval to reuse
+        """
+        await self._query_vector(user_message)
+    
+    async def chat(
+        self,
+        user_message: str,
+        chat_history: Optional[ChatHistory] = None
     ) -> RAGResponse:
         """
         Main chat method - natural conversation with background analysis
         Uses dataset for both classification and response generation
         """
+        conversation = as_conversation(chat_history)
+        
+        normalized = normalize_message(user_message)
+        retrieved, query_vector = await self._retrieve_context(user_message, normalized, conversation)
         
-        if chat_history is None:
-            chat_history = []
+        return await self._respond(user_message, normalized, conversation, retrieved, query_vector)
+    
+    async def chat_batch(
+        self,
+        messages: List[str],
+        chat_histories: Optional[List[ChatHistory]] = None
+    ) -> List[RAGResponse]:
+        """
+        Batched chat - one embedding round-trip for all messages,
+        classification and generation for each message run concurrently
+        """
+        if not messages:
+            return []
         
-        user_msg_count = len([m for m in chat_history if m.role == "user"]) + 1
+        if chat_histories is None:
+            chat_histories = [None] * len(messages)
+        conversations = [as_conversation(history) for history in chat_histories]
         
-        is_crisis = self._check_crisis(user_message)
+        normalized = [normalize_message(m) for m in messages]
+        retrieved_batch, vectors = await self._retrieve_conversation_context(messages, normalized, conversations)
+        
+        return list(await asyncio.gather(*[
+            self._respond(message, norm, conversation, retrieved, vector)
+            for message, norm, conversation, retrieved, vector
+            in zip(messages, normalized, conversations, retrieved_batch, vectors)
+        ]))
+    
+    async def _respond(
+        self,
+        user_message: str,
+        normalized: str,
+        conversation: Conversation,
+        retrieved: List[Dict],
+        query_vector: Optional[List[float]] = None
+    ) -> RAGResponse:
+        """Classify and answer a message given its retrieved context"""
+        chat_history = conversation.messages
+        user_msg_count = conversation.user_count + 1
+        
+        is_crisis = self._check_crisis(normalized)
+        
+        response_key = None
+        semantic_vector = None
+        if not is_crisis:
+            cached, response_key, semantic_vector = await self._lookup_cached_reply(
+                user_message, normalized, chat_history, query_vector
+            )
+            if cached is not None:
+                answer, classification, confidence = cached
+                return self._build_response(
+                    answer, classification, confidence, retrieved, is_crisis, user_msg_count
+                )
         
-        retrieved = self._retrieve_context(user_message)
         context = self._format_context(retrieved)
         
         logger.info(f"Retrieved {len(retrieved)} documents from knowledge base")
         if retrieved:
             logger.debug(f"Context preview: {context[:200]}...")
         
-        classification, confidence = self._analyze_mental_state(chat_history, user_message, context)
-        
+        # Normal turns get the reply and classification from one structured
+        # call; crisis turns use the plain crisis prompt and skip classification,
+        # as do turns too early for a label to be shown
         if is_crisis:
+            answer = await self._generate_response(
+                user_message=user_message,
+                context=context,
+                chat_history=chat_history,
+                is_crisis=True
+            )
             classification = "Suicidal"
             confidence = 1.0
+        elif user_msg_count < MIN_MESSAGES_FOR_LABEL:
+            answer = await self._generate_response(user_message, context, chat_history)
+            classification, confidence = None, 0.0
+            self._store_reply(response_key, semantic_vector, answer, classification, confidence)
+        else:
+            combined = await self._generate_with_classification(user_message, context, chat_history)
+            if combined is not None:
+                answer, classification, confidence = combined
+            else:
+                (classification, confidence), answer = await asyncio.gather(
+                    self._analyze_mental_state(conversation.recent_user_texts(), user_message, context),
+                    self._generate_response(user_message, context, chat_history)
+                )
+            
+            self._store_reply(response_key, semantic_vector, answer, classification, confidence)
         
+        return self._build_response(
+            answer, classification, confidence, retrieved, is_crisis, user_msg_count
+        )
+    
+    async def _lookup_cached_reply(
+        self,
+        user_message: str,
+        normalized: str,
+        chat_history: List[Dict[str, str]],
+        query_vector: Optional[List[float]] = None
+    ) -> Tuple[Optional[Tuple[str, str, float]], Optional[str], Optional[List[float]]]:
+        """
+        Look a non-crisis turn up in the reply caches
+        Near-duplicate lookup is limited to opening messages, where the reply depends on nothing else;
+        it reuses the retrieval query vector and only embeds when retrieval was served from cache
+        Returns: (cached entry or None, exact cache key, semantic cache vector) for storing the reply later
+        """
+        response_key = self._response_cache_key(normalized, chat_history)
+        cached = self.response_cache.get(response_key) if response_key else None
+        
+        semantic_vector = None
+        if cached is None and self.semantic_cache is not None and not chat_history:
+            semantic_vector = query_vector if query_vector is not None else await self._query_vector(user_message)
+            if semantic_vector is not None:
+                cached = self.semantic_cache.get(semantic_vector)
+        
+        return cached, response_key, semantic_vector
+    
+    def _store_reply(
+        self,
+        response_key: Optional[str],
+        semantic_vector: Optional[List[float]],
+        answer: str,
+        classification: Optional[str],
+        confidence: float
+    ) -> None:
+        """Remember a generated non-crisis reply; fallback replies are never cached"""
+        if answer == FALLBACK_REPLY:
+            return
+        entry = (answer, classification, confidence)
+        if response_key:
+            self.response_cache.set(response_key, entry)
+        if semantic_vector is not None:
+            self.semantic_cache.set(semantic_vector, entry)
+    
+    async def chat_stream(
+        self,
+        user_message: str,
+        chat_history: Optional[ChatHistory] = None
+    ) -> AsyncIterator[Union[str, RAGResponse]]:
+        """
+        Streaming chat - yields reply text chunks as they are generated,
+        then the complete RAGResponse as the final item
+        Classification runs concurrently with the streamed reply
+        """
+        conversation = as_conversation(chat_history)
+        chat_history = conversation.messages
+        
+        normalized = normalize_message(user_message)
+        user_msg_count = conversation.user_count + 1
+        is_crisis = self._check_crisis(normalized)
+        retrieved, query_vector = await self._retrieve_context(user_message, normalized, conversation)
+        
+        response_key = None
+        semantic_vector = None
+        if not is_crisis:
+            cached, response_key, semantic_vector = await self._lookup_cached_reply(
+                user_message, normalized, chat_history, query_vector
+            )
+            if cached is not None:
+                answer, classification, confidence = cached
+                yield answer
+                yield self._build_response(
+                    answer, classification, confidence, retrieved, is_crisis, user_msg_count
+                )
+                return
+        
+        context = self._format_context(retrieved)
+        
+        classification_task = None
+        if not is_crisis and user_msg_count >= MIN_MESSAGES_FOR_LABEL:
+            classification_task = asyncio.create_task(
+                self._analyze_mental_state(conversation.recent_user_texts(), user_message, context)
+            )
+        
+        chunks = []
+        failed = False
+        try:
+            async for chunk in self._stream_response(user_message, context, chat_history, is_crisis):
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            logger.error(f"Streaming generation error: {e}")
+            failed = True
+            if not chunks:
+                chunks.append(FALLBACK_REPLY)
+                yield FALLBACK_REPLY
+        except BaseException:
+            if classification_task is not None:
+                classification_task.cancel()
+            raise
+        answer = "".join(chunks)
+        
+        if is_crisis:
+            classification, confidence = "Suicidal", 1.0
+        else:
+            if classification_task is not None:
+                classification, confidence = await classification_task
+            else:
+                classification, confidence = None, 0.0
+            if not failed:
+                self._store_reply(response_key, semantic_vector, answer, classification, confidence)
+        
+        yield self._build_response(
+            answer, classification, confidence, retrieved, is_crisis, user_msg_count
+        )
+    
+    def _build_response(
+        self,
+        answer: str,
+        classification: Optional[str],
+        confidence: float,
+        retrieved: List[Dict],
+        is_crisis: bool,
+        user_msg_count: int
+    ) -> RAGResponse:
+        """Attach the status label for this turn to an answer"""
         show_label = (
             user_msg_count >= MIN_MESSAGES_FOR_LABEL and 
             confidence >= CONFIDENCE_THRESHOLD and
@@ -316,13 +839,6 @@ Remember: Reference this knowledge naturally without mentioning "database" or "k
             confidence_pct = int(confidence * 100)
             status_label = f"{classification} ({confidence_pct}%)"
         
-        answer = self._generate_response(
-            user_message=user_message,
-            context=context,
-            chat_history=chat_history,
-            is_crisis=is_crisis
-        )
-        
         return RAGResponse(
             answer=answer,
             classification=classification,
@@ -339,6 +855,23 @@ Remember: Reference this knowledge naturally without mentioning "database" or "k
         return """I'm really concerned about what you've shared. You matter, and help is available.
 
  Please reach out now:
-...ceritanya no darurat...
+ - National Suicide Prevention Lifeline: 988 (US)
+ - Crisis Text Line: Text HOME to 741741
+ - International: https://findahelpline.com
 
-I'm here with you, but please also contact one of these resources. You don't have to go through this alone."""
\ No newline at end of file
+I'm here with you, but please also contact one of these resources. You don't have to go through this alone."""
+    
+    def build_crisis_response(self, chat_history: Optional[ChatHistory] = None) -> RAGResponse:
+        """Canned crisis response, used when crisis keywords are caught before RAG"""
+        conversation = as_conversation(chat_history)
+        
+        return RAGResponse(
+            answer=self.get_crisis_response(),
+            classification="Suicidal",
+            confidence=1.0,
+            retrieved_context=[],
+            is_crisis=True,
+            status_label="Suicidal (100%)",
+            show_label=True,
+            message_count=conversation.user_count + 1
+        )
\ No newline at end of file
@@ -91,6 +91,8 @@ def main():
         host=args.host,
         port=args.port,
         reload=args.reload,
+        loop="uvloop" if sys.platform != "win32" else "auto",
+        http="httptools",
         log_level="info"
     )
 
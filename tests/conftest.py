@@ -0,0 +1,39 @@
+"""
+Shared pytest fixtures and markers
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import settings
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "external: needs the OpenAI-backed service; skipped when no API key is configured"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip external tests up front instead of letting them hit an uninitialized service"""
+    if settings.OPENAI_API_KEY or os.getenv("OPENAI_API_KEY"):
+        return
+
+    skip_external = pytest.mark.skip(reason="OPENAI_API_KEY not set")
+    for item in items:
+        if "external" in item.keywords:
+            item.add_marker(skip_external)
+
+
+@pytest.fixture(scope="session")
+def client():
+    """One TestClient for the whole session; app startup and shutdown run once"""
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
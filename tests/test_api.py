@@ -1,23 +1,24 @@
 """
 Tests for Mental Health Chatbot API
+The `client` fixture comes from conftest.py; tests that need the
+OpenAI-backed service are marked `external`
 """
+import asyncio
+
+import httpx
 import pytest
-from fastapi.testclient import TestClient
 import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from app.main import app
-
-
-client = TestClient(app)
+from app.main import app, get_batch_scheduler, get_rag_chain, get_session_manager
 
 
 class TestHealthEndpoints:
     """Test health and stats endpoints"""
     
-    def test_root_endpoint(self):
+    def test_root_endpoint(self, client):
         """Test root endpoint returns API info"""
         response = client.get("/")
         assert response.status_code == 200
@@ -25,7 +26,7 @@ class TestHealthEndpoints:
         assert "message" in data
         assert "version" in data
     
-    def test_health_endpoint(self):
+    def test_health_endpoint(self, client):
         """Test health check endpoint"""
         response = client.get("/health")
         assert response.status_code == 200
@@ -34,10 +35,11 @@ class TestHealthEndpoints:
         assert "vector_store_status" in data
 
 
+@pytest.mark.external
 class TestChatEndpoints:
     """Test chat functionality"""
     
-    def test_chat_simple_greeting(self):
+    def test_chat_simple_greeting(self, client):
         """Test simple chat with greeting"""
         response = client.post(
             "/chat/simple",
@@ -45,7 +47,7 @@ class TestChatEndpoints:
         )
         assert response.status_code in [200, 503]
     
-    def test_chat_full_endpoint(self):
+    def test_chat_full_endpoint(self, client):
         """Test full chat endpoint"""
         response = client.post(
             "/chat",
@@ -63,7 +65,19 @@ class TestChatEndpoints:
             assert "classification" in data
             assert "is_crisis" in data
     
-    def test_chat_with_context(self):
+    def test_chat_intake(self, client):
+        """Test bulk intake endpoint"""
+        response = client.post(
+            "/chat/intake",
+            json={"entries": ["Couldn't sleep again", "Work was overwhelming today"]}
+        )
+        assert response.status_code in [200, 503]
+        
+        if response.status_code == 200:
+            data = response.json()
+            assert len(data["results"]) == 2
+    
+    def test_chat_with_context(self, client):
         """Test chat with context retrieval"""
         response = client.post(
             "/chat",
@@ -78,12 +92,12 @@ class TestChatEndpoints:
 class TestSessionManagement:
     """Test session endpoints"""
     
-    def test_session_stats_not_found(self):
+    def test_session_stats_not_found(self, client):
         """Test session stats for non-existent session"""
         response = client.get("/session/nonexistent_session/stats")
         assert response.status_code in [200, 404, 503]
     
-    def test_clear_session(self):
+    def test_clear_session(self, client):
         """Test clearing a session"""
         response = client.delete("/session/test_session_to_clear")
         assert response.status_code in [200, 404, 503]
@@ -91,8 +105,18 @@ class TestSessionManagement:
 
 class TestInputValidation:
     """Test input validation"""
+
+    @pytest.fixture(autouse=True)
+    def stub_services(self):
+        """Request bodies are rejected before the services are used, so none are needed"""
+        dependencies = (get_rag_chain, get_batch_scheduler, get_session_manager)
+        for dependency in dependencies:
+            app.dependency_overrides[dependency] = lambda: None
+        yield
+        for dependency in dependencies:
+            app.dependency_overrides.pop(dependency, None)
     
-    def test_empty_message(self):
+    def test_empty_message(self, client):
         """Test that empty messages are rejected"""
         response = client.post(
             "/chat",
@@ -102,7 +126,8 @@ class TestInputValidation:
             }
         )
         assert response.status_code == 422
-    def test_long_message(self):
+
+    def test_long_message(self, client):
         """Test message length limit"""
         long_message = "a" * 6000  
         response = client.post(
@@ -115,22 +140,32 @@ class TestInputValidation:
         assert response.status_code == 422
 
 
+@pytest.mark.external
 class TestCrisisDetection:
     """Test crisis detection (these tests are sensitive)"""
+
+    @pytest.fixture
+    def started_app(self, client):
+        """The app after the session client has run its startup;
+        ASGITransport does not run lifespan events itself"""
+        return client.app
     
-    def test_crisis_keywords_detected(self):
-        """Test that crisis indicators are detected"""
+    @pytest.mark.asyncio
+    async def test_crisis_keywords_detected(self, started_app):
+        """Test that crisis indicators are detected, sending the messages concurrently"""
         crisis_messages = [
             "I want to end my life",
             "I've been thinking about suicide"
         ]
         
-        for msg in crisis_messages:
-            response = client.post(
-                "/chat",
-                json={"message": msg}
-            )
-            
+        transport = httpx.ASGITransport(app=started_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            responses = await asyncio.gather(*[
+                async_client.post("/chat", json={"message": msg})
+                for msg in crisis_messages
+            ])
+        
+        for response in responses:
             if response.status_code == 200:
                 data = response.json()
                 assert data.get("is_crisis") == True
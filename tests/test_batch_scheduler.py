@@ -0,0 +1,80 @@
+"""
+Tests for the chat micro-batching scheduler
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.batch_scheduler import BatchScheduler
+
+
+class FakeChain:
+    """Records the batches it receives and echoes messages back"""
+
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.fail = fail
+
+    async def chat_batch(self, messages, chat_histories):
+        self.batches.append(list(messages))
+        if self.fail:
+            raise RuntimeError("backend down")
+        return [f"echo: {m}" for m in messages]
+
+
+class TestBatchScheduler:
+    """Test request coalescing"""
+
+    def test_concurrent_requests_share_one_batch(self):
+        """Requests submitted together are dispatched as a single batch"""
+        chain = FakeChain()
+
+        async def run():
+            scheduler = BatchScheduler(chain, max_batch=8, max_wait_ms=20)
+            results = await asyncio.gather(*[scheduler.submit(f"m{i}") for i in range(5)])
+            await scheduler.stop()
+            return results
+
+        results = asyncio.run(run())
+
+        assert results == [f"echo: m{i}" for i in range(5)]
+        assert chain.batches == [[f"m{i}" for i in range(5)]]
+
+    def test_batches_capped_at_max_batch(self):
+        """Queued requests are split into batches of at most max_batch"""
+        chain = FakeChain()
+
+        async def run():
+            scheduler = BatchScheduler(chain, max_batch=2, max_wait_ms=5)
+            await asyncio.gather(*[scheduler.submit(f"m{i}") for i in range(5)])
+            await scheduler.stop()
+
+        asyncio.run(run())
+
+        assert all(len(batch) <= 2 for batch in chain.batches)
+        assert sum(len(batch) for batch in chain.batches) == 5
+
+    def test_errors_propagate_to_callers(self):
+        """A failing batch raises in every waiting request"""
+        chain = FakeChain(fail=True)
+
+        async def run():
+            scheduler = BatchScheduler(chain, max_batch=4, max_wait_ms=5)
+            try:
+                return await asyncio.gather(
+                    scheduler.submit("a"), scheduler.submit("b"), return_exceptions=True
+                )
+            finally:
+                await scheduler.stop()
+
+        results = asyncio.run(run())
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
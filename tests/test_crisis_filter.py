@@ -0,0 +1,76 @@
+"""
+Tests for the crisis keyword pre-filter
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import CRISIS_KEYWORDS
+from app import crisis_filter as crisis_filter_module
+from app.crisis_filter import CrisisFilter
+from models.rag_chain import MentalHealthRAGChain, normalize_message
+
+
+# Inflections, affixes and spacing variants the baseline substring check caught
+INFLECTED_CRISIS_MESSAGES = [
+    "I self-harmed yesterday",
+    "two overdoses this year",
+    "he read about suicides online",
+    "I want to end  my life",
+    "thinking about self harm",
+    "I keep SELF HARMING",
+    "aku ingin mengakhiri hidupku",
+    "aku pengen membunuh diri",
+    "menyakiti diriku sendiri",
+    "bunuh diriku"
+]
+
+
+class TestCrisisFilter:
+    """Test keyword detection with both backends"""
+
+    @pytest.fixture(params=["default", "regex"])
+    def crisis_filter(self, request, monkeypatch):
+        if request.param == "regex":
+            monkeypatch.setattr(crisis_filter_module, "hyperscan", None)
+        return CrisisFilter(CRISIS_KEYWORDS)
+
+    def test_detects_crisis_keywords(self, crisis_filter):
+        """English and Indonesian crisis phrases are caught regardless of case"""
+        assert crisis_filter.is_crisis("I want to END MY LIFE")
+        assert crisis_filter.is_crisis("aku ingin mati saja")
+
+    def test_ignores_normal_messages(self, crisis_filter):
+        """Ordinary messages pass through"""
+        assert not crisis_filter.is_crisis("I had a long day at work")
+        assert not crisis_filter.is_crisis("")
+
+    def test_matches_whole_words_only(self, crisis_filter):
+        """Keywords inside longer words do not match"""
+        assert not crisis_filter.is_crisis("the uncutting edge")
+        assert crisis_filter.is_crisis("thinking about self-harm again")
+
+    @pytest.mark.parametrize("message", INFLECTED_CRISIS_MESSAGES)
+    def test_detects_inflected_keywords(self, crisis_filter, message):
+        """Suffixes on the last keyword word and any separator between words still match"""
+        assert crisis_filter.is_crisis(message)
+
+    def test_agrees_with_chain(self, crisis_filter):
+        """The pre-filter and the chain's own check give the same answer"""
+        chain = MentalHealthRAGChain(vector_store=None, openai_client=None)
+        messages = INFLECTED_CRISIS_MESSAGES + [
+            "the uncutting edge",
+            "I had a long day at work",
+            "saya mau matikan lampu",
+            "aku ingin mati saja"
+        ]
+
+        for message in messages:
+            assert crisis_filter.is_crisis(message) == chain._check_crisis(normalize_message(message)), message
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,62 @@
+"""
+Tests for text chunking and dataset loading
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.data_loader import DataLoader, chunk_text
+
+
+class TestChunkText:
+    """Test sentence-aware chunking"""
+
+    def test_short_text_is_one_chunk(self):
+        """Text within chunk_size is returned unchanged"""
+        assert chunk_text("Hello there.", chunk_size=50) == ["Hello there."]
+
+    def test_cuts_after_last_sentence_end(self):
+        """Chunks end at the last sentence boundary in the window"""
+        text = "One two. Three four! Five six seven eight nine ten eleven"
+
+        chunks = chunk_text(text, chunk_size=30, overlap=5)
+
+        assert chunks[0] == "One two. Three four!"
+        assert chunks[-1].endswith("eleven")
+
+    def test_boundary_inside_overlap_is_ignored(self):
+        """A sentence end too early in the window does not stall chunking"""
+        text = "Hi. " + "x" * 100
+
+        chunks = chunk_text(text, chunk_size=40, overlap=10)
+
+        assert chunks[0] == text[:40]
+        assert len(chunks) == 4
+
+
+class TestParquetCache:
+    """Test the Parquet copy kept next to each dataset CSV"""
+
+    def test_corrupt_cache_falls_back_to_csv(self, tmp_path):
+        """An unreadable cache is ignored and rewritten from the CSV"""
+        pytest.importorskip("pyarrow")
+        (tmp_path / "dataset_statements.csv").write_text(
+            'statement,status\n"I feel fine",Normal\n"Can\'t sleep",Anxiety\n'
+        )
+        loader = DataLoader(tmp_path)
+
+        assert len(loader.load_statements_dataset()) == 2
+
+        cache = tmp_path / "dataset_statements.parquet"
+        cache.write_bytes(b"not parquet")
+
+        assert len(loader.load_statements_dataset()) == 2
+        assert cache.read_bytes()[:4] == b"PAR1"
+        assert not list(tmp_path.glob("*.tmp"))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,85 @@
+"""
+Tests for the embedding request coalescer
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.embedding_coalescer import EmbeddingCoalescer
+
+
+class FakeEmbedder:
+    """Records the batches it receives and returns one-element vectors"""
+
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.fail = fail
+
+    async def __call__(self, texts):
+        self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("backend down")
+        return [[float(len(text))] for text in texts]
+
+
+class TestEmbeddingCoalescer:
+    """Test embedding request coalescing"""
+
+    def test_concurrent_requests_share_one_call(self):
+        """Concurrent requests are embedded together, duplicates once"""
+        embedder = FakeEmbedder()
+
+        async def run():
+            coalescer = EmbeddingCoalescer(embedder, max_batch=16, max_wait_ms=20)
+            results = await asyncio.gather(
+                coalescer.submit(["a"]),
+                coalescer.submit(["bb", "a"]),
+                coalescer.submit(["ccc"])
+            )
+            await coalescer.stop()
+            return results
+
+        results = asyncio.run(run())
+
+        assert results == [[[1.0]], [[2.0], [1.0]], [[3.0]]]
+        assert embedder.batches == [["a", "bb", "ccc"]]
+
+    def test_batches_capped_at_max_batch(self):
+        """Queued texts are split into batches of at most max_batch"""
+        embedder = FakeEmbedder()
+
+        async def run():
+            coalescer = EmbeddingCoalescer(embedder, max_batch=2, max_wait_ms=5)
+            await asyncio.gather(*[coalescer.submit([f"t{i}"]) for i in range(5)])
+            await coalescer.stop()
+
+        asyncio.run(run())
+
+        assert all(len(batch) <= 2 for batch in embedder.batches)
+        assert sum(len(batch) for batch in embedder.batches) == 5
+
+    def test_errors_propagate_to_callers(self):
+        """A failed embedding call fails every request in the batch"""
+        embedder = FakeEmbedder(fail=True)
+
+        async def run():
+            coalescer = EmbeddingCoalescer(embedder, max_wait_ms=5)
+            results = await asyncio.gather(
+                coalescer.submit(["a"]),
+                coalescer.submit(["b"]),
+                return_exceptions=True
+            )
+            await coalescer.stop()
+            return results
+
+        results = asyncio.run(run())
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,43 @@
+"""
+Tests for the disk-backed document embedding store
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.embedding_store import EmbeddingStore
+
+
+class TestEmbeddingStore:
+    """Test storing and reloading embeddings"""
+
+    def test_round_trip_survives_reopen(self, tmp_path):
+        """Stored vectors are returned after reopening; unknown texts miss"""
+        path = tmp_path / "embeddings.sqlite3"
+        store = EmbeddingStore(path, embedding_model="model-a")
+        store.put_many(["a", "b"], [[0.5, 1.0], [0.25, -2.0]])
+        store.close()
+
+        store = EmbeddingStore(path, embedding_model="model-a")
+
+        found = store.get_many(["b", "c", "a"])
+
+        assert found[0].tolist() == [0.25, -2.0]
+        assert found[1] is None
+        assert found[2].tolist() == [0.5, 1.0]
+        assert store.count() == 2
+
+    def test_keyed_by_model_and_dimensions(self, tmp_path):
+        """A different model or dimension setting does not reuse vectors"""
+        path = tmp_path / "embeddings.sqlite3"
+        EmbeddingStore(path, embedding_model="model-a", embedding_dimensions=2).put_many(["a"], [[1.0, 0.0]])
+
+        assert EmbeddingStore(path, embedding_model="model-b", embedding_dimensions=2).get_many(["a"]) == [None]
+        assert EmbeddingStore(path, embedding_model="model-a", embedding_dimensions=4).get_many(["a"]) == [None]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,55 @@
+"""
+Tests for the retrieval query cache
+"""
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.query_cache import QueryCache
+
+
+class TestQueryCache:
+    """Test LRU + TTL behaviour"""
+
+    def test_key_normalizes_text(self):
+        """Case and whitespace differences map to the same key"""
+        assert QueryCache.make_key("  I feel   SAD ", 5) == QueryCache.make_key("i feel sad", 5)
+        assert QueryCache.make_key("i feel sad", 5) != QueryCache.make_key("i feel sad", 3)
+
+    def test_hit_and_miss_counters(self):
+        """Lookups update hit/miss counters"""
+        cache = QueryCache(max_size=4, ttl_seconds=60)
+        assert cache.get("k") is None
+        cache.set("k", [1])
+        assert cache.get("k") == [1]
+
+        stats = cache.get_stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+
+    def test_lru_eviction(self):
+        """Least recently used entry is evicted when full"""
+        cache = QueryCache(max_size=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_ttl_expiry(self):
+        """Entries expire after the TTL"""
+        cache = QueryCache(max_size=2, ttl_seconds=0.01)
+        cache.set("a", 1)
+        time.sleep(0.02)
+        assert cache.get("a") is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,308 @@
+"""
+Tests for the RAG chain using a fake vector store and OpenAI client
+"""
+import asyncio
+import math
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models.rag_chain import (
+    CHARS_PER_TOKEN,
+    CONTEXT_MAX_DOCS,
+    CONTEXT_RECENT_DOCS,
+    CONTEXT_TOKEN_BUDGET,
+    Conversation,
+    MentalHealthRAGChain,
+    normalize_message
+)
+from app.query_cache import QueryCache
+from utils.semantic_cache import SemanticCache
+
+
+class FakeVectorStore:
+    """Returns a fixed embedding and top_k documents per query text, counting embed calls"""
+
+    def __init__(self):
+        self.embed_calls = 0
+        self.embedded = []
+
+    async def aembed(self, texts):
+        self.embed_calls += 1
+        self.embedded.extend(texts)
+        return [[1.0, 0.0, 0.0] for _ in texts]
+
+    def search_by_vectors(self, query_embeddings, top_k):
+        texts = self.embedded[-len(query_embeddings):]
+        return [
+            [
+                {'content': f'doc {rank} for {text}', 'metadata': {'source': 'qa_dataset'}, 'similarity': 0.9}
+                for rank in range(top_k)
+            ]
+            for text in texts
+        ]
+
+
+class FakeCompletions:
+    """Records completion requests; answers structured requests with JSON unless told not to"""
+
+    def __init__(self, structured: bool = True):
+        self.calls = 0
+        self.requests = []
+        self.structured = structured
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        self.requests.append(kwargs)
+        if kwargs.get("stream"):
+            return self._stream(["I hear ", "you."])
+        logprobs = None
+        if self.structured and "response_format" in kwargs:
+            content = '{"reply": "I hear you.", "classification": "Anxiety", "confidence": 0.9}'
+        elif kwargs.get("logprobs"):
+            content = "Anxiety"
+            logprobs = SimpleNamespace(content=[SimpleNamespace(logprob=math.log(0.9))])
+        else:
+            content = "I hear you."
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, logprobs=logprobs)])
+
+    async def _stream(self, parts):
+        for part in parts:
+            delta = SimpleNamespace(content=part)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+# Two earlier user turns, so the next message is old enough to be classified
+HISTORY = [
+    {"role": "user", "content": "hi"},
+    {"role": "assistant", "content": "Hey! How are you?"},
+    {"role": "user", "content": "not great"},
+    {"role": "assistant", "content": "I'm sorry. What's going on?"}
+]
+
+
+def make_chain(structured: bool = True, **caches):
+    completions = FakeCompletions(structured)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    chain = MentalHealthRAGChain(vector_store=FakeVectorStore(), openai_client=client, **caches)
+    return chain, completions
+
+
+class TestCrisisCheck:
+    """Test the chain's whole-word crisis keyword matcher"""
+
+    @pytest.fixture
+    def chain(self):
+        return MentalHealthRAGChain(vector_store=None, openai_client=None)
+
+    def test_detects_crisis_keywords(self, chain):
+        """Keywords are found in normalized text"""
+        assert chain._check_crisis(normalize_message("I want to  END MY LIFE"))
+        assert chain._check_crisis(normalize_message("aku ingin mati saja"))
+
+    def test_ignores_normal_messages(self, chain):
+        """Ordinary messages pass through"""
+        assert not chain._check_crisis(normalize_message("I had a long day at work"))
+        assert not chain._check_crisis("")
+
+    def test_matches_whole_words_only(self):
+        """Keywords inside longer words do not match; phrases match across punctuation"""
+        chain = MentalHealthRAGChain(vector_store=None, openai_client=None)
+
+        assert not chain._check_crisis(normalize_message("the uncutting edge"))
+        assert chain._check_crisis(normalize_message("I keep thinking about self harm"))
+        assert chain._check_crisis(normalize_message("I overdosed last week"))
+
+
+class TestCombinedCall:
+    """Test the single structured reply + classification call"""
+
+    def test_one_call_per_turn(self):
+        """Reply and classification come from one completion"""
+        chain, completions = make_chain()
+
+        response = asyncio.run(chain.chat("I feel anxious", HISTORY))
+
+        assert completions.calls == 1
+        assert response.answer == "I hear you."
+        assert response.classification == "Anxiety"
+        assert response.confidence == 0.9
+
+    def test_falls_back_to_two_calls(self):
+        """Unparseable structured output falls back to separate calls"""
+        chain, completions = make_chain(structured=False)
+
+        response = asyncio.run(chain.chat("I feel anxious", HISTORY))
+
+        assert completions.calls == 3
+        assert response.classification == "Anxiety"
+        assert response.confidence == pytest.approx(0.9)
+
+    def test_accepts_conversation(self):
+        """A Conversation's user count decides whether the turn is classified"""
+        chain, completions = make_chain()
+        conversation = Conversation()
+        conversation.append_user("hi")
+        conversation.append_assistant("Hey! How are you?")
+        conversation.append_user("not great")
+
+        response = asyncio.run(chain.chat("I feel anxious", conversation))
+
+        assert response.classification == "Anxiety"
+        assert response.message_count == 3
+
+    def test_early_turns_skip_classification(self):
+        """Before a label can be shown, only the reply is generated"""
+        chain, completions = make_chain()
+
+        response = asyncio.run(chain.chat("I feel anxious"))
+
+        assert completions.calls == 1
+        assert response.classification is None
+        assert response.confidence == 0.0
+        assert not response.show_label
+
+
+class TestConversationRetrieval:
+    """Test retrieval over the current and recent user messages"""
+
+    def test_recent_messages_retrieved_in_one_call(self):
+        """Earlier user messages add their documents ahead of the current message's lower-ranked ones"""
+        chain, _ = make_chain()
+
+        response = asyncio.run(chain.chat("I feel anxious", HISTORY))
+
+        split = CONTEXT_MAX_DOCS - CONTEXT_RECENT_DOCS
+        contents = [doc['content'] for doc in response.retrieved_context]
+        assert chain.vector_store.embed_calls == 1
+        assert contents[:split] == [f"doc {rank} for I feel anxious" for rank in range(split)]
+        assert contents[split:split + 4] == [
+            "doc 0 for not great",
+            "doc 1 for not great",
+            "doc 0 for hi",
+            "doc 1 for hi"
+        ]
+
+    def test_recent_message_documents_reach_prompt(self):
+        """The prompt holds the current message's top documents and the latest earlier message's"""
+        chain, completions = make_chain()
+
+        asyncio.run(chain.chat("I feel anxious", HISTORY))
+
+        prompt = "\n".join(message["content"] for message in completions.requests[-1]["messages"])
+        assert "doc 0 for I feel anxious" in prompt
+        assert "doc 0 for not great" in prompt
+        assert f"doc {CONTEXT_MAX_DOCS - 1} for I feel anxious" not in prompt
+
+
+class TestContextFormatting:
+    """Test the bounded knowledge-base context"""
+
+    def test_context_deduplicated_and_bounded(self):
+        """Duplicates are skipped and long documents are cut to the token budget"""
+        chain = MentalHealthRAGChain(vector_store=None, openai_client=None)
+        docs = [
+            {'content': 'Breathing helps', 'metadata': {'source': 'qa_dataset'}},
+            {'content': 'breathing  helps', 'metadata': {'source': 'qa_dataset'}},
+            {'content': 'word ' * 1000, 'metadata': {'source': 'statements'}}
+        ]
+
+        context = chain._format_context(docs)
+
+        assert context.count("reathing") == 1
+        assert context.startswith("[1] (qa_dataset) Breathing helps\n[2] (statements) word")
+        assert len(context) < CONTEXT_TOKEN_BUDGET * CHARS_PER_TOKEN + 100
+
+
+class TestClassificationParsing:
+    """Test parsing of the plain-text classification reply"""
+
+    def test_parses_label_and_confidence(self):
+        """Labels are matched case-insensitively and confidence is clamped"""
+        parse = MentalHealthRAGChain._parse_classification
+
+        assert parse("CLASSIFICATION: personality disorder\nCONFIDENCE: 0.8") == ("Personality Disorder", 0.8)
+        assert parse("classification: [Stress]\nconfidence: 1.7") == ("Stress", 1.0)
+        assert parse("Bipolar") == ("Bipolar", 0.5)
+        assert parse("I am not sure") == ("Normal", 0.5)
+
+
+class TestChatStream:
+    """Test streamed replies"""
+
+    def test_streams_chunks_then_response(self):
+        """Text chunks come first, the full RAGResponse last"""
+        chain, completions = make_chain()
+
+        async def collect():
+            return [item async for item in chain.chat_stream("I feel anxious", HISTORY)]
+
+        items = asyncio.run(collect())
+
+        assert items[:-1] == ["I hear ", "you."]
+        assert items[-1].answer == "I hear you."
+        assert items[-1].classification == "Anxiety"
+
+
+class TestResponseCache:
+    """Test exact and semantic reply caching"""
+
+    def test_repeated_message_served_from_cache(self):
+        """The same message with the same history skips the LLM"""
+        chain, completions = make_chain(response_cache=QueryCache())
+
+        first = asyncio.run(chain.chat("I feel anxious"))
+        calls = completions.calls
+        second = asyncio.run(chain.chat("  i feel ANXIOUS "))
+
+        assert completions.calls == calls
+        assert second.answer == first.answer
+        assert second.classification == first.classification
+
+    def test_different_history_misses(self):
+        """History is part of the exact cache key"""
+        chain, completions = make_chain(response_cache=QueryCache())
+
+        asyncio.run(chain.chat("I feel anxious"))
+        calls = completions.calls
+        asyncio.run(chain.chat("I feel anxious", [{"role": "user", "content": "hi"}]))
+
+        assert completions.calls > calls
+
+    def test_semantic_hit_on_opening_message(self):
+        """A near-duplicate opening message reuses the cached reply"""
+        chain, completions = make_chain(semantic_cache=SemanticCache())
+
+        asyncio.run(chain.chat("I feel anxious"))
+        calls = completions.calls
+        asyncio.run(chain.chat("I am feeling anxious"))
+
+        assert completions.calls == calls
+
+    def test_query_embedded_once_per_turn(self):
+        """Retrieval and the semantic cache share one query embedding"""
+        chain, _ = make_chain(semantic_cache=SemanticCache())
+
+        asyncio.run(chain.chat("I feel anxious"))
+
+        assert chain.vector_store.embed_calls == 1
+
+    def test_crisis_messages_not_cached(self):
+        """Crisis turns always reach the LLM"""
+        chain, completions = make_chain(response_cache=QueryCache())
+
+        asyncio.run(chain.chat("I want to end my life"))
+        calls = completions.calls
+        response = asyncio.run(chain.chat("I want to end my life"))
+
+        assert completions.calls > calls
+        assert response.is_crisis
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,80 @@
+"""
+Tests for the embedding-similarity cache
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.semantic_cache import SemanticCache
+
+
+class TestSemanticCache:
+    """Test nearest-neighbour lookup and slot reuse"""
+
+    def test_near_duplicate_hits(self):
+        """A vector above the threshold returns the stored value"""
+        cache = SemanticCache(max_size=4, threshold=0.95)
+        cache.set([1.0, 0.0, 0.0], "greeting")
+
+        assert cache.get([0.99, 0.05, 0.0]) == "greeting"
+        assert cache.get([0.0, 1.0, 0.0]) is None
+
+        stats = cache.get_stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+
+    def test_lru_slot_reused_when_full(self):
+        """The least recently used entry is replaced once full"""
+        cache = SemanticCache(max_size=2, threshold=0.95)
+        cache.set([1.0, 0.0, 0.0], "a")
+        cache.set([0.0, 1.0, 0.0], "b")
+        cache.get([1.0, 0.0, 0.0])
+        cache.set([0.0, 0.0, 1.0], "c")
+
+        assert cache.get([0.0, 1.0, 0.0]) is None
+        assert cache.get([1.0, 0.0, 0.0]) == "a"
+        assert cache.get([0.0, 0.0, 1.0]) == "c"
+
+    def test_quantized_matches_float(self):
+        """int8 storage gives the same hits and misses as float32"""
+        cache = SemanticCache(max_size=4, threshold=0.95, quantize=True)
+        cache.set([1.0, 0.0, 0.0], "greeting")
+        cache.set([0.0, 0.6, 0.8], "question")
+
+        assert cache.get([0.99, 0.05, 0.0]) == "greeting"
+        assert cache.get([0.0, 0.61, 0.79]) == "question"
+        assert cache.get([0.5, 0.5, 0.5]) is None
+
+    def test_quantized_similarity_close_to_float(self):
+        """Scaled int8 dot products stay within a few 1e-3 of float32 cosine similarity"""
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((8, 1536))
+        query = vectors[3] + 0.3 * rng.standard_normal(1536)
+        exact = max(
+            float(SemanticCache._normalize(v) @ SemanticCache._normalize(query)) for v in vectors
+        )
+
+        cache = SemanticCache(max_size=8, threshold=exact - 0.01, quantize=True)
+        for i, vector in enumerate(vectors):
+            cache.set(vector, i)
+
+        assert cache.get(query) == 3
+        cache.threshold = exact + 0.01
+        assert cache.get(query) is None
+
+    def test_clear(self):
+        """Cleared caches miss"""
+        cache = SemanticCache(max_size=2)
+        cache.set([1.0, 0.0], "a")
+        cache.clear()
+
+        assert cache.get([1.0, 0.0]) is None
+        assert cache.get_stats()['size'] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
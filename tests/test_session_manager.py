@@ -0,0 +1,300 @@
+"""
+Tests for the in-memory and Redis-backed session managers
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.session_manager import RedisSessionManager, SessionManager
+
+
+class FakeStore:
+    """In-memory list, hash and key commands, as RedisSessionManager uses them"""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    def rpush(self, key, value):
+        self.data.setdefault(key, []).append(value)
+
+    def ltrim(self, key, start, end):
+        items = self.data.get(key, [])
+        self.data[key] = items[start:] if end == -1 else items[start:end + 1]
+
+    def lrange(self, key, start, end):
+        items = self.data.get(key, [])
+        return list(items[start:] if end == -1 else items[start:end + 1])
+
+    def llen(self, key):
+        return len(self.data.get(key, []))
+
+    def hsetnx(self, key, field, value):
+        self.data.setdefault(key, {}).setdefault(field, str(value))
+
+    def hset(self, key, field, value):
+        self.data.setdefault(key, {})[field] = str(value)
+
+    def hincrby(self, key, field, amount):
+        fields = self.data.setdefault(key, {})
+        fields[field] = str(int(fields.get(field, 0)) + amount)
+
+    def hget(self, key, field):
+        return self.data.get(key, {}).get(field)
+
+    def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    def expire(self, key, seconds):
+        self.ttls[key] = seconds
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def scan(self, match):
+        prefix, suffix = match.split("*")
+        return [key for key in self.data if key.startswith(prefix) and key.endswith(suffix)]
+
+
+class FakeRedis:
+    """Async client over a FakeStore, shaped like redis.asyncio.Redis"""
+
+    def __init__(self):
+        self.store = FakeStore()
+        self.closed = False
+
+    def __getattr__(self, name):
+        command = getattr(self.store, name)
+
+        async def call(*args):
+            return command(*args)
+        return call
+
+    def pipeline(self):
+        return FakePipeline(self.store)
+
+    async def scan_iter(self, match):
+        for key in self.store.scan(match):
+            yield key
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FakePipeline:
+    """Queues commands and runs them on an awaited execute, like a redis.asyncio pipeline"""
+
+    def __init__(self, store):
+        self.store = store
+        self.commands = []
+
+    def __getattr__(self, name):
+        command = getattr(self.store, name)
+        return lambda *args: self.commands.append((command, args))
+
+    async def execute(self):
+        return [command(*args) for command, args in self.commands]
+
+
+class TestSessionHistory:
+    """Test message storage and trimming"""
+
+    def test_history_round_trip(self):
+        """Messages come back in order with role and content"""
+        sessions = SessionManager()
+
+        async def run():
+            await sessions.add_message("s1", "user", "hello")
+            await sessions.add_message("s1", "assistant", "hi there")
+            return await sessions.get_chat_history("s1")
+
+        history = asyncio.run(run())
+        assert [(m["role"], m["content"]) for m in history] == [
+            ("user", "hello"),
+            ("assistant", "hi there")
+        ]
+
+    def test_history_trimmed_to_max_messages(self):
+        """Only the most recent max_messages are kept"""
+        sessions = SessionManager(max_messages_per_session=3)
+
+        async def run():
+            for i in range(5):
+                await sessions.add_message("s1", "user", f"m{i}")
+            return await sessions.get_chat_history("s1")
+
+        history = asyncio.run(run())
+        assert [m["content"] for m in history] == ["m2", "m3", "m4"]
+
+    def test_conversation_counts_all_user_messages(self):
+        """The user count survives history trimming"""
+        sessions = SessionManager(max_messages_per_session=2)
+
+        async def run():
+            for i in range(3):
+                await sessions.add_message("s1", "user", f"m{i}")
+                await sessions.add_message("s1", "assistant", f"r{i}")
+            return await sessions.get_conversation("s1")
+
+        conversation = asyncio.run(run())
+        assert [m["content"] for m in conversation.messages] == ["m2", "r2"]
+        assert conversation.user_count == 3
+
+    def test_session_stats(self):
+        """Stats count crisis flags and classifications"""
+        sessions = SessionManager()
+
+        async def run():
+            await sessions.add_message("s1", "user", "a", classification="Anxiety")
+            await sessions.add_message("s1", "user", "b", classification="Anxiety", is_crisis=True)
+            await sessions.add_message("s1", "assistant", "c")
+            return await sessions.get_session_stats("s1")
+
+        stats = asyncio.run(run())
+        assert stats['message_count'] == 3
+        assert stats['crisis_detections'] == 1
+        assert stats['classifications'] == {"Anxiety": 2}
+
+    def test_clear_session(self):
+        """Cleared sessions are gone"""
+        sessions = SessionManager()
+
+        async def run():
+            await sessions.add_message("s1", "user", "a")
+            cleared = await sessions.clear_session("s1")
+            return cleared, await sessions.get_session_stats("s1"), await sessions.clear_session("s1")
+
+        assert asyncio.run(run()) == (True, None, False)
+
+
+class TestSessionEviction:
+    """Test max_sessions and TTL enforcement"""
+
+    def test_lru_session_evicted_at_capacity(self):
+        """The least recently used session is dropped when full"""
+        sessions = SessionManager(max_sessions=2)
+
+        async def run():
+            await sessions.add_message("a", "user", "1")
+            await sessions.add_message("b", "user", "2")
+            await sessions.get_chat_history("a")
+            await sessions.add_message("c", "user", "3")
+            return (
+                await sessions.get_session_count(),
+                await sessions.get_session_stats("b"),
+                await sessions.get_session_stats("a")
+            )
+
+        count, stats_b, stats_a = asyncio.run(run())
+        assert count == 2
+        assert stats_b is None
+        assert stats_a is not None
+
+    def test_sweep_removes_only_idle_sessions(self):
+        """Sessions idle past the TTL are swept"""
+        sessions = SessionManager(session_ttl_hours=1)
+
+        async def run():
+            await sessions.add_message("old", "user", "1")
+            await sessions.add_message("new", "user", "2")
+            sessions.sessions["old"]['last_accessed'] = time.time() - 2 * 3600
+            return (
+                await sessions.sweep_expired(),
+                await sessions.get_session_stats("old"),
+                await sessions.get_session_stats("new")
+            )
+
+        removed, stats_old, stats_new = asyncio.run(run())
+        assert removed == 1
+        assert stats_old is None
+        assert stats_new is not None
+
+
+class TestRedisSessionManager:
+    """Test the Redis-backed manager against a fake client"""
+
+    @pytest.fixture
+    def sessions(self):
+        manager = RedisSessionManager("redis://localhost:6379/0", session_ttl_hours=2, max_messages_per_session=2)
+        manager.redis = FakeRedis()
+        return manager
+
+    def test_conversation_trimmed_with_full_user_count(self, sessions):
+        """History is trimmed to max_messages; the user count covers every message"""
+        async def run():
+            for i in range(3):
+                await sessions.add_message("s1", "user", f"m{i}")
+                await sessions.add_message("s1", "assistant", f"r{i}")
+            return await sessions.get_conversation("s1"), await sessions.get_chat_history("s1")
+
+        conversation, history = asyncio.run(run())
+
+        assert [m["content"] for m in conversation.messages] == ["m2", "r2"]
+        assert conversation.user_count == 3
+        assert history == conversation.messages
+
+    def test_keys_expire_after_session_ttl(self, sessions):
+        """Both session keys get the TTL in seconds"""
+        asyncio.run(sessions.add_message("s1", "user", "a"))
+
+        assert sessions.redis.store.ttls == {"sess:s1": 2 * 3600, "sess:s1:stats": 2 * 3600}
+
+    def test_stats_and_clear(self, sessions):
+        """Stats count crisis flags and classifications; cleared sessions are gone"""
+        async def run():
+            await sessions.add_message("s1", "user", "a", classification="Anxiety")
+            await sessions.add_message("s1", "user", "b", classification="Anxiety", is_crisis=True)
+            stats = await sessions.get_session_stats("s1")
+            count = await sessions.get_session_count()
+            cleared = await sessions.clear_session("s1")
+            return stats, count, cleared, await sessions.get_session_stats("s1")
+
+        stats, count, cleared, stats_after = asyncio.run(run())
+
+        assert stats['message_count'] == 2
+        assert stats['crisis_detections'] == 1
+        assert stats['classifications'] == {"Anxiety": 2}
+        assert count == 1
+        assert cleared is True
+        assert stats_after is None
+
+
+
+class TestBackendsAgree:
+    """Test that both session backends report the same statistics"""
+
+    @pytest.fixture(params=["memory", "redis"])
+    def sessions(self, request):
+        if request.param == "memory":
+            return SessionManager(max_messages_per_session=2)
+        manager = RedisSessionManager("redis://localhost:6379/0", max_messages_per_session=2)
+        manager.redis = FakeRedis()
+        return manager
+
+    def test_counters_cover_trimmed_messages(self, sessions):
+        """Crisis and classification counts include messages trimmed from history"""
+        async def run():
+            await sessions.add_message("s1", "user", "a", classification="Anxiety", is_crisis=True)
+            await sessions.add_message("s1", "assistant", "b")
+            await sessions.add_message("s1", "user", "c", classification="Stress")
+            await sessions.add_message("s1", "assistant", "d")
+            return await sessions.get_session_stats("s1")
+
+        stats = asyncio.run(run())
+
+        assert stats['message_count'] == 2
+        assert stats['crisis_detections'] == 1
+        assert stats['classifications'] == {"Anxiety": 1, "Stress": 1}
+
+    def test_close(self, sessions):
+        """Both backends shut down the same way"""
+        asyncio.run(sessions.close())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,74 @@
+"""
+Tests for vector store helpers and collection handling that need no API access
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.semantic_cache import SemanticCache
+from utils.vector_store import CHARS_PER_TOKEN, VectorStore, pack_embedding_batches
+
+
+class TestPackEmbeddingBatches:
+    """Test token-budgeted batching of embedding requests"""
+
+    def test_short_texts_share_one_request(self):
+        """Texts well under the budget go in a single range"""
+        assert pack_embedding_batches(["hi"] * 500) == [(0, 500)]
+
+    def test_item_cap(self):
+        """No range exceeds max_items"""
+        assert pack_embedding_batches(["hi"] * 5, max_items=2) == [(0, 2), (2, 4), (4, 5)]
+
+    def test_token_budget(self):
+        """Long texts split by estimated tokens; an oversized text still gets its own range"""
+        long_text = "x" * (CHARS_PER_TOKEN * 60)
+        texts = [long_text, long_text, "short", long_text * 5]
+
+        assert pack_embedding_batches(texts, max_tokens=100) == [(0, 1), (1, 3), (3, 4)]
+
+    def test_empty(self):
+        """No texts, no requests"""
+        assert pack_embedding_batches([]) == []
+
+
+class TestStaleCollection:
+    """Test recovery when another client recreates the collection"""
+
+    def test_reopens_recreated_collection(self, tmp_path):
+        """A stale handle is re-opened and its cached results dropped"""
+        writer = VectorStore(str(tmp_path), "kb_test", "sk-test")
+        reader = VectorStore(str(tmp_path), "kb_test", "sk-test", result_cache=SemanticCache())
+        writer.collection.add(ids=["old"], embeddings=[[1.0, 0.0, 0.0]], documents=["old doc"])
+
+        assert reader.search_by_vectors([[1.0, 0.0, 0.0]], top_k=1)[0][0]['content'] == "old doc"
+
+        writer.clear_collection()
+        writer.collection.add(ids=["new"], embeddings=[[1.0, 0.0, 0.0]], documents=["new doc"])
+
+        assert reader.get_collection_stats()['count'] == 1
+        assert reader.search_by_vectors([[1.0, 0.0, 0.0]], top_k=1)[0][0]['content'] == "new doc"
+        assert reader._known_ids == {"new"}
+
+
+class TestEmbeddingDimensions:
+    """Test handling of a collection built with another embedding size"""
+
+    def test_mismatched_collection_cleared(self, tmp_path):
+        """Opening a collection of the wrong size empties it for re-indexing"""
+        old = VectorStore(str(tmp_path), "kb_test", "sk-test", embedding_dimensions=3)
+        old.collection.add(ids=["old"], embeddings=[[1.0, 0.0, 0.0]], documents=["old doc"])
+
+        same = VectorStore(str(tmp_path), "kb_test", "sk-test", embedding_dimensions=3)
+        assert same.get_collection_stats()['count'] == 1
+
+        resized = VectorStore(str(tmp_path), "kb_test", "sk-test", embedding_dimensions=2)
+        assert resized.get_collection_stats()['count'] == 0
+        assert not resized._known_ids
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
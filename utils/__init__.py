@@ -1,4 +1,10 @@
-from .data_loader import DataLoader, Document, chunk_text
+from .data_loader import DataLoader, Document, chunk_text, load_all_datasets
 from .vector_store import VectorStore
+from .semantic_cache import SemanticCache
+from .embedding_coalescer import EmbeddingCoalescer
+from .embedding_store import EmbeddingStore
 
-__all__ = ["DataLoader", "Document", "chunk_text", "VectorStore"]
+__all__ = [
+    "DataLoader", "Document", "chunk_text", "load_all_datasets",
+    "VectorStore", "SemanticCache", "EmbeddingCoalescer", "EmbeddingStore"
+]
@@ -0,0 +1,40 @@
+"""
+Crisis keyword patterns shared by the API pre-filter and the RAG chain
+Both normalize text and compile keywords the same way, so they always agree
+"""
+import re
+from typing import List
+
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Optional suffix on a keyword's last word: English inflections (suicides,
+# overdoses, self-harmed) and Indonesian enclitics (diriku, hidupnya)
+INFLECTION_SUFFIX = r"(?:s|es|d|ed|ing|ku|mu|nya|lah)?"
+
+
+def normalize_message(text: str) -> str:
+    """Lowercase and collapse whitespace; computed once per message and reused"""
+    return " ".join(text.lower().split())
+
+
+def crisis_patterns(keywords: List[str]) -> List[str]:
+    """
+    One regex per keyword, for normalized text
+    The keyword's words must appear in order on word boundaries, separated by any
+    run of non-word characters ("self harm" matches "self-harm"), and the last
+    word may carry an inflection suffix
+    """
+    patterns = []
+    for keyword in keywords:
+        words = WORD_PATTERN.findall(normalize_message(keyword))
+        patterns.append(r"\b" + r"\W+".join(map(re.escape, words)) + INFLECTION_SUFFIX + r"\b")
+    return patterns
+
+
+def compile_crisis_regex(keywords: List[str]) -> "re.Pattern[str]":
+    """
+    All crisis patterns as one regex
+    ASCII word rules, the same as Hyperscan applies without UCP mode
+    """
+    return re.compile("|".join(crisis_patterns(keywords)), re.ASCII)
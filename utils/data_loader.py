@@ -1,14 +1,26 @@
+import os
+import re
+import tempfile
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Tuple, Optional
 import logging
 from dataclasses import dataclass
 
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+SENTENCE_END = re.compile(r"[.!?] |\n")
+
+
+@dataclass(slots=True)
 class Document:
     """Represents a document for the vector store"""
     content: str
@@ -22,6 +34,41 @@ class DataLoader:
     def __init__(self, data_dir: Path):
         self.data_dir = Path(data_dir)
     
+    def _read_csv(self, filepath: Path, **kwargs) -> pd.DataFrame:
+        """
+        Read a dataset CSV through a Parquet copy kept next to it
+        The copy is rewritten whenever the CSV is newer or the copy is unreadable;
+        without pyarrow the CSV is always parsed
+        """
+        if pyarrow is None:
+            return pd.read_csv(filepath, **kwargs)
+        
+        cache_path = filepath.with_suffix('.parquet')
+        if cache_path.exists() and cache_path.stat().st_mtime >= filepath.stat().st_mtime:
+            try:
+                return pd.read_parquet(cache_path)
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable Parquet cache {cache_path}: {e}")
+        
+        df = pd.read_csv(filepath, **kwargs)
+        self._write_parquet_cache(df, cache_path)
+        return df
+    
+    @staticmethod
+    def _write_parquet_cache(df: pd.DataFrame, cache_path: Path) -> None:
+        """Write to a temp file and rename it into place, so readers never see a partial file"""
+        fd, tmp_name = tempfile.mkstemp(dir=cache_path.parent, prefix=cache_path.name, suffix='.tmp')
+        os.close(fd)
+        try:
+            df.to_parquet(tmp_name, compression='zstd')
+            os.replace(tmp_name, cache_path)
+        except Exception as e:
+            logger.warning(f"Could not write Parquet cache {cache_path}: {e}")
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+    
     def load_qa_dataset(self, filename: str = "dataset_qa.csv") -> List[Document]:
         """
         Load QA dataset and convert to documents for RAG
@@ -39,27 +86,33 @@ class DataLoader:
             return []
         
         try:
-            df = pd.read_csv(filepath, header=None, names=['id', 'question', 'answer', 'intent'])
-            documents = []
+            df = self._read_csv(filepath, header=None, names=['id', 'question', 'answer', 'intent'])
+            
+            questions = df['question'].map(str)
+            df = df[~questions.str.startswith('Intent ')]
             
-            for idx, row in df.iterrows():
-                if str(row['question']).startswith('Intent '):
-                    continue
-                
-                content = f"Question: {row['question']}\nAnswer: {row['answer']}"
-                
-                doc = Document(
+            contents = "Question: " + questions[df.index] + "\nAnswer: " + df['answer'].map(str)
+            
+            documents = [
+                Document(
                     content=content,
                     metadata={
                         'source': 'qa_dataset',
-                        'intent': row['intent'],
-                        'question': row['question'],
-                        'answer': row['answer'],
+                        'intent': intent,
+                        'question': question,
+                        'answer': answer,
                         'type': 'qa_pair'
                     },
                     doc_id=f"qa_{idx}"
                 )
-                documents.append(doc)
+                for idx, content, question, answer, intent in zip(
+                    df.index.tolist(),
+                    contents.tolist(),
+                    df['question'].tolist(),
+                    df['answer'].tolist(),
+                    df['intent'].tolist()
+                )
+            ]
             
             logger.info(f"Loaded {len(documents)} QA pairs from {filename}")
             return documents
@@ -85,17 +138,13 @@ class DataLoader:
             return []
         
         try:
-            df = pd.read_csv(filepath)
-            documents = []
+            df = self._read_csv(filepath)
             
             statement_col = 'statement' if 'statement' in df.columns else df.columns[1]
             status_col = 'status' if 'status' in df.columns else df.columns[2]
             
-            for idx, row in df.iterrows():
-                content = str(row[statement_col])
-                status = str(row[status_col])
-                
-                doc = Document(
+            documents = [
+                Document(
                     content=content,
                     metadata={
                         'source': 'statements_dataset',
@@ -104,7 +153,12 @@ class DataLoader:
                     },
                     doc_id=f"stmt_{idx}"
                 )
-                documents.append(doc)
+                for idx, content, status in zip(
+                    df.index.tolist(),
+                    df[statement_col].map(str).tolist(),
+                    df[status_col].map(str).tolist()
+                )
+            ]
             
             logger.info(f"Loaded {len(documents)} statements from {filename}")
             return documents
@@ -114,14 +168,14 @@ class DataLoader:
             return []
     
     def load_all_datasets(self) -> List[Document]:
-        """Load all available datasets"""
-        all_documents = []
-        
-        qa_docs = self.load_qa_dataset()
-        all_documents.extend(qa_docs)
-        
-        stmt_docs = self.load_statements_dataset()
-        all_documents.extend(stmt_docs)
+        """
+        Load all available datasets
+        Each dataset is read on its own thread; the CSV and Parquet readers release the GIL
+        """
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            qa_future = executor.submit(self.load_qa_dataset)
+            stmt_future = executor.submit(self.load_statements_dataset)
+            all_documents = qa_future.result() + stmt_future.result()
         
         logger.info(f"Total documents loaded: {len(all_documents)}")
         return all_documents
@@ -139,7 +193,7 @@ class DataLoader:
             return [], []
         
         try:
-            df = pd.read_csv(filepath)
+            df = self._read_csv(filepath)
             statement_col = 'statement' if 'statement' in df.columns else df.columns[1]
             status_col = 'status' if 'status' in df.columns else df.columns[2]
             
@@ -153,6 +207,14 @@ class DataLoader:
             return [], []
 
 
+def load_all_datasets(data_dir: Path) -> List[Document]:
+    """
+    Load all datasets from data_dir
+    Top-level so it can be submitted to a process pool
+    """
+    return DataLoader(data_dir).load_all_datasets()
+
+
 def chunk_text(text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]:
     """
     Split text into overlapping chunks
@@ -175,11 +237,13 @@ def chunk_text(text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]
         end = start + chunk_size
         
         if end < len(text):
-            for sep in ['. ', '! ', '? ', '\n']:
-                last_sep = text[start:end].rfind(sep)
-                if last_sep != -1:
-                    end = start + last_sep + len(sep)
-                    break
+            # Cut after the last sentence end in the window, scanning it once
+            # without slicing; ends inside the overlap would not advance
+            last = None
+            for last in SENTENCE_END.finditer(text, start + overlap, end):
+                pass
+            if last is not None:
+                end = last.end()
         
         chunks.append(text[start:end].strip())
         start = end - overlap
@@ -0,0 +1,112 @@
+"""
+Coalescing layer for concurrent embedding requests
+Texts requested within a short window are embedded in one OpenAI call
+"""
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Deque, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+EmbedFunction = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+class EmbeddingCoalescer:
+    """
+    Collects embedding requests from concurrent callers into batched calls
+    A batch is dispatched when max_batch texts are queued or max_wait_ms has passed
+    """
+
+    def __init__(
+        self,
+        embed: EmbedFunction,
+        max_batch: int = 100,
+        max_wait_ms: int = 8
+    ):
+        self.embed = embed
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+
+        self._queue: Deque[Tuple[List[str], asyncio.Future]] = deque()
+        self._queued_texts = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: set = set()
+
+        logger.info(f"Initialized EmbeddingCoalescer with max_batch={max_batch}, max_wait_ms={max_wait_ms}")
+
+    def start(self) -> None:
+        """Start the background batching loop on the running event loop"""
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the batching loop and fail any queued requests"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        while self._queue:
+            _, future = self._queue.popleft()
+            if not future.done():
+                future.set_exception(RuntimeError("Embedding coalescer stopped"))
+        self._queued_texts = 0
+
+    async def submit(self, texts: List[str]) -> List[List[float]]:
+        """Queue texts for embedding and wait for their vectors"""
+        self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append((texts, future))
+        self._queued_texts += len(texts)
+        self._wakeup.set()
+
+        return await future
+
+    async def _run(self) -> None:
+        """Collect queued requests into batches and dispatch them"""
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+            if self._queued_texts < self.max_batch:
+                await asyncio.sleep(self.max_wait)
+
+            while self._queue:
+                batch = [self._queue.popleft()]
+                size = len(batch[0][0])
+                while self._queue and size + len(self._queue[0][0]) <= self.max_batch:
+                    batch.append(self._queue.popleft())
+                    size += len(batch[-1][0])
+                self._queued_texts -= size
+
+                task = asyncio.create_task(self._dispatch(batch))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: List[Tuple[List[str], asyncio.Future]]) -> None:
+        """Embed the unique texts of one batch and resolve each caller's future"""
+        unique = list(dict.fromkeys(text for texts, _ in batch for text in texts))
+
+        logger.debug(f"Dispatching embedding batch of {len(unique)} texts from {len(batch)} requests")
+
+        try:
+            vectors = dict(zip(unique, await self.embed(unique)))
+        except Exception as e:
+            logger.error(f"Error in embedding batch: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for texts, future in batch:
+            if not future.done():
+                future.set_result([vectors[text] for text in texts])
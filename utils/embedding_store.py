@@ -0,0 +1,86 @@
+"""
+Disk-backed cache of document embeddings
+Re-indexing and restarts reuse stored vectors instead of calling OpenAI again
+"""
+import hashlib
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+# Stay below SQLite's default limit on bound parameters per statement
+MAX_QUERY_KEYS = 900
+
+
+class EmbeddingStore:
+    """
+    SQLite table of float32 embeddings keyed by a blake2b hash of
+    the model, the dimensions and the text
+
+    Keys include the model and dimensions, so changing either setting
+    misses instead of returning vectors of the wrong shape.
+    """
+
+    def __init__(self, path: str, embedding_model: str, embedding_dimensions: Optional[int] = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._prefix = f"{embedding_model}:{embedding_dimensions or ''}\n".encode()
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+        logger.info(f"Initialized EmbeddingStore at {self.path}")
+
+    def _key(self, text: str) -> bytes:
+        return hashlib.blake2b(self._prefix + text.encode(), digest_size=16).digest()
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Get the stored embedding for each text, or None where there is none"""
+        keys = [self._key(text) for text in texts]
+        found = {}
+
+        with self._lock:
+            for i in range(0, len(keys), MAX_QUERY_KEYS):
+                chunk = keys[i:i + MAX_QUERY_KEYS]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ))
+
+        return [
+            np.frombuffer(found[key], dtype=np.float32) if key in found else None
+            for key in keys
+        ]
+
+    def put_many(self, texts: List[str], embeddings: List[np.ndarray]) -> None:
+        """Store embeddings for texts, replacing existing entries"""
+        rows = [
+            (self._key(text), np.asarray(embedding, dtype=np.float32).tobytes())
+            for text, embedding in zip(texts, embeddings)
+        ]
+
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+            self._conn.commit()
+
+    def count(self) -> int:
+        """Number of stored embeddings"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
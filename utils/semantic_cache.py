@@ -0,0 +1,119 @@
+"""
+Embedding-similarity cache for near-duplicate chat messages
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """
+    Bounded cache that returns the value stored for the most similar
+    previously seen query vector, if its cosine similarity reaches threshold
+
+    Vectors are kept L2-normalized in one preallocated matrix whose first
+    len(cache) rows are in use, so a lookup is a single matrix-vector product
+    over a view of those rows; the least recently used slot is reused once
+    the cache is full.
+
+    With quantize=True stored vectors are kept as int8 with a per-vector
+    scale, a quarter of the float32 footprint. The query is quantized the
+    same way and the dot product accumulates in int32 before scaling, so
+    the matrix is never converted; cosine similarity of normalized vectors
+    shifts by a few 1e-3, well inside typical thresholds.
+    """
+
+    def __init__(self, max_size: int = 512, threshold: float = 0.95, quantize: bool = False):
+        self.max_size = max_size
+        self.threshold = threshold
+        self.quantize = quantize
+        self._vectors: Optional[np.ndarray] = None
+        self._scales = np.ones(max_size, dtype=np.float32)
+        self._values: List[Any] = [None] * max_size
+        self._slots: "OrderedDict[int, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        logger.info(
+            f"Initialized SemanticCache with max_size={max_size}, threshold={threshold}, quantize={quantize}"
+        )
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        """Convert to a unit-length float32 array"""
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    @staticmethod
+    def _quantize(vector: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Convert to int8 and the scale that maps it back to float"""
+        peak = float(np.abs(vector).max()) or 1.0
+        return np.round(vector * (127 / peak)).astype(np.int8), peak / 127
+
+    def get(self, vector: List[float]) -> Optional[Any]:
+        """Get the value stored for the nearest vector, or None below threshold"""
+        query = self._normalize(vector)
+
+        with self._lock:
+            if not self._slots or self._vectors.shape[1] != query.shape[0]:
+                self.misses += 1
+                return None
+
+            # Slots are filled in order and reused in place, so rows 0..n-1 are in use
+            n = len(self._slots)
+            if self.quantize:
+                quantized, scale = self._quantize(query)
+                dots = np.einsum('ij,j->i', self._vectors[:n], quantized, dtype=np.int32)
+                similarities = dots * (self._scales[:n] * scale)
+            else:
+                similarities = self._vectors[:n] @ query
+            slot = int(np.argmax(similarities))
+
+            if similarities[slot] < self.threshold:
+                self.misses += 1
+                return None
+
+            self._slots.move_to_end(slot)
+            self.hits += 1
+            return self._values[slot]
+
+    def set(self, vector: List[float], value: Any) -> None:
+        """Store a value under a query vector, reusing the LRU slot when full"""
+        normalized = self._normalize(vector)
+
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != normalized.shape[0]:
+                dtype = np.int8 if self.quantize else np.float32
+                self._vectors = np.zeros((self.max_size, normalized.shape[0]), dtype=dtype)
+                self._slots.clear()
+
+            if len(self._slots) < self.max_size:
+                slot = len(self._slots)
+            else:
+                slot, _ = self._slots.popitem(last=False)
+
+            if self.quantize:
+                self._vectors[slot], self._scales[slot] = self._quantize(normalized)
+            else:
+                self._vectors[slot] = normalized
+            self._values[slot] = value
+            self._slots[slot] = None
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        with self._lock:
+            self._slots.clear()
+            self._values = [None] * self.max_size
+
+    def get_stats(self) -> dict:
+        """Get cache size and hit/miss counters"""
+        with self._lock:
+            return {'size': len(self._slots), 'hits': self.hits, 'misses': self.misses}
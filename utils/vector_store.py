@@ -1,29 +1,113 @@
 import chromadb
 from chromadb.config import Settings as ChromaSettings
-from openai import OpenAI
+from chromadb.errors import NotFoundError
+from openai import OpenAI, AsyncOpenAI
 from typing import List, Dict, Optional, Tuple
+import asyncio
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+import base64
 import hashlib
 
+import numpy as np
+import orjson
+
 from utils.data_loader import Document
+from utils.semantic_cache import SemanticCache
+from utils.embedding_coalescer import EmbeddingCoalescer
+from utils.embedding_store import EmbeddingStore
 
 
 logger = logging.getLogger(__name__)
 
 
+# OpenAI accepts at most 2048 inputs per embeddings request
+MAX_EMBEDDING_INPUTS = 2048
+
+# and at most 300k tokens; requests are packed to half that to absorb estimate error
+MAX_BATCH_TOKENS = 150_000
+CHARS_PER_TOKEN = 4
+
+# Fields search needs from Chroma; embeddings are never read back
+QUERY_INCLUDE = ["documents", "metadatas", "distances"]
+
+
+def pack_embedding_batches(
+    texts: List[str],
+    max_tokens: int = MAX_BATCH_TOKENS,
+    max_items: int = MAX_EMBEDDING_INPUTS
+) -> List[Tuple[int, int]]:
+    """
+    Split texts into consecutive (start, end) ranges, one per embedding request
+    Each range holds at most max_items texts and about max_tokens estimated tokens
+    """
+    ranges = []
+    start = 0
+    tokens = 0
+    for i, text in enumerate(texts):
+        estimate = len(text) // CHARS_PER_TOKEN + 1
+        if i > start and (tokens + estimate > max_tokens or i - start >= max_items):
+            ranges.append((start, i))
+            start, tokens = i, 0
+        tokens += estimate
+    if start < len(texts):
+        ranges.append((start, len(texts)))
+    return ranges
+
+
+def decode_embeddings(response) -> List[np.ndarray]:
+    """Decode a base64 embeddings response straight to float32 arrays, skipping Python float lists"""
+    return [np.frombuffer(base64.b64decode(item.embedding), dtype=np.float32) for item in response.data]
+
+
+ANN_PROFILES = {
+    "fast": 32,
+    "balanced": 96,
+    "recall-max": 256
+}
+
+
 class VectorStore:
     def __init__(
         self,
         persist_directory: str,
         collection_name: str,
         openai_api_key: str,
-        embedding_model: str = "text-embedding-3-small"
+        embedding_model: str = "text-embedding-3-small",
+        embedding_dimensions: Optional[int] = None,
+        ann_profile: str = "balanced",
+        hnsw_m: int = 32,
+        hnsw_construction_ef: int = 100,
+        openai_client: Optional[OpenAI] = None,
+        async_openai_client: Optional[AsyncOpenAI] = None,
+        embedding_cache_size: int = 10000,
+        result_cache: Optional[SemanticCache] = None,
+        embedding_coalesce_ms: int = 0,
+        embedding_store: Optional[EmbeddingStore] = None
     ):
         self.persist_directory = Path(persist_directory)
         self.collection_name = collection_name
         self.embedding_model = embedding_model
-        self.openai_client = OpenAI(api_key=openai_api_key)
+        self.embedding_dimensions = embedding_dimensions
+        self.search_ef = ANN_PROFILES[ann_profile]
+        self.hnsw_m = hnsw_m
+        self.hnsw_construction_ef = hnsw_construction_ef
+        self.openai_client = openai_client or OpenAI(api_key=openai_api_key)
+        self.async_openai_client = async_openai_client or AsyncOpenAI(api_key=openai_api_key)
+        self.embedding_cache_size = embedding_cache_size
+        self._emb_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._emb_cache_lock = threading.Lock()
+        self.result_cache = result_cache
+        # Document embeddings persisted across restarts and re-indexing, if configured
+        self.embedding_store = embedding_store
+        # Cache misses from concurrent aembed calls share one request when a window is set
+        self.embedding_coalescer = (
+            EmbeddingCoalescer(self._aembed_uncached, max_wait_ms=embedding_coalesce_ms)
+            if embedding_coalesce_ms > 0 else None
+        )
         self.persist_directory.mkdir(parents=True, exist_ok=True)
         
         self.chroma_client = chromadb.PersistentClient(
@@ -33,12 +117,92 @@ class VectorStore:
         
         self.collection = self.chroma_client.get_or_create_collection(
             name=collection_name,
-            metadata={"hnsw:space": "cosine"}
+            metadata=self._collection_metadata()
         )
         
+        # IDs already stored, so add_documents can skip duplicates without querying Chroma
+        self._known_ids = set(self.collection.get(include=[])['ids'])
+        
+        self._apply_search_ef()
+        self._check_embedding_dimensions()
+        
         logger.info(f"Initialized vector store with collection: {collection_name}")
     
-    def _get_embeddings(self, texts: List[str]) -> List[List[float]]:
+    def _collection_metadata(self) -> Dict:
+        """
+        HNSW settings for newly created collections
+        M and construction_ef are fixed once the index is built; they take
+        effect for existing data after /index/reload recreates the collection
+        """
+        return {
+            "hnsw:space": "cosine",
+            "hnsw:M": self.hnsw_m,
+            "hnsw:construction_ef": self.hnsw_construction_ef,
+            "hnsw:search_ef": self.search_ef
+        }
+    
+    def _refresh_collection(self) -> None:
+        """Re-open the collection after it was deleted and recreated through another client"""
+        logger.warning(f"Collection {self.collection_name} was recreated elsewhere; re-opening it")
+        self.collection = self.chroma_client.get_or_create_collection(
+            name=self.collection_name,
+            metadata=self._collection_metadata()
+        )
+        self._known_ids = set(self.collection.get(include=[])['ids'])
+        self._clear_result_cache()
+    
+    def _collection_call(self, method: str, **kwargs):
+        """Call a collection method, re-opening a stale collection handle once"""
+        try:
+            return getattr(self.collection, method)(**kwargs)
+        except NotFoundError:
+            self._refresh_collection()
+            return getattr(self.collection, method)(**kwargs)
+    
+    def _apply_search_ef(self) -> None:
+        """Apply the ANN profile's ef_search to an existing collection"""
+        try:
+            self.collection.modify(configuration={"hnsw": {"ef_search": self.search_ef}})
+        except Exception as e:
+            logger.warning(f"Could not set ef_search={self.search_ef} on existing collection: {e}")
+    
+    def set_ann_profile(self, ann_profile: str) -> None:
+        """Switch the HNSW search profile (fast, balanced, recall-max)"""
+        self.search_ef = ANN_PROFILES[ann_profile]
+        self._apply_search_ef()
+        logger.info(f"ANN profile set to {ann_profile} (ef_search={self.search_ef})")
+    
+    def _embedding_kwargs(self) -> Dict:
+        """Extra arguments for embedding requests; vectors come back as base64 for decode_embeddings"""
+        if self.embedding_dimensions:
+            return {'encoding_format': 'base64', 'dimensions': self.embedding_dimensions}
+        return {'encoding_format': 'base64'}
+    
+    def _check_embedding_dimensions(self) -> None:
+        """
+        Clear the collection if its vectors were built with a different embedding size
+        Queries of the new size would fail against it, so it is emptied and
+        startup re-indexes it the same way as a new store
+        """
+        if not self.embedding_dimensions:
+            return
+        try:
+            sample = self.collection.peek(limit=1)
+        except Exception as e:
+            logger.error(f"Error checking embedding dimensions: {e}")
+            return
+        
+        embeddings = sample.get('embeddings')
+        if embeddings is not None and len(embeddings) > 0:
+            stored = len(embeddings[0])
+            if stored != self.embedding_dimensions:
+                logger.warning(
+                    f"Collection {self.collection_name} holds {stored}-dim embeddings but "
+                    f"EMBEDDING_DIMENSIONS={self.embedding_dimensions}; clearing it for re-indexing"
+                )
+                self.clear_collection()
+    
+    def _get_embeddings(self, texts: List[str]) -> List[np.ndarray]:
         """
         Generate embeddings for texts using OpenAI
         
@@ -49,17 +213,15 @@ class VectorStore:
             List of embedding vectors
         """
         try:
-            batch_size = 100
             all_embeddings = []
             
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i:i + batch_size]
+            for start, end in pack_embedding_batches(texts):
                 response = self.openai_client.embeddings.create(
                     model=self.embedding_model,
-                    input=batch
+                    input=texts[start:end],
+                    **self._embedding_kwargs()
                 )
-                batch_embeddings = [item.embedding for item in response.data]
-                all_embeddings.extend(batch_embeddings)
+                all_embeddings.extend(decode_embeddings(response))
             
             return all_embeddings
             
@@ -67,15 +229,142 @@ class VectorStore:
             logger.error(f"Error generating embeddings: {e}")
             raise
     
+    def _get_document_embeddings(self, texts: List[str]) -> List[np.ndarray]:
+        """
+        Embeddings for documents being indexed;
+        only texts missing from the embedding store are sent to OpenAI
+        """
+        if self.embedding_store is None:
+            return self._get_embeddings(texts)
+        
+        embeddings = self.embedding_store.get_many(texts)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            fetched = self._get_embeddings(missing_texts)
+            self.embedding_store.put_many(missing_texts, fetched)
+            for i, embedding in zip(missing, fetched):
+                embeddings[i] = embedding
+        
+        return embeddings
+    
+    def _lookup_cached_embeddings(self, texts: List[str]) -> Tuple[List[str], List[Optional[np.ndarray]], List[str]]:
+        """
+        Look query texts up in the embedding LRU, keyed on whitespace-normalized text
+        Returns: (keys, cached embedding or None per text, unique keys that missed)
+        """
+        keys = [" ".join(text.split()) for text in texts]
+        
+        with self._emb_cache_lock:
+            embeddings = []
+            for key in keys:
+                embedding = self._emb_cache.get(key)
+                if embedding is not None:
+                    self._emb_cache.move_to_end(key)
+                embeddings.append(embedding)
+        
+        missing = list(dict.fromkeys(key for key, emb in zip(keys, embeddings) if emb is None))
+        return keys, embeddings, missing
+    
+    def _store_cached_embeddings(
+        self,
+        keys: List[str],
+        embeddings: List[Optional[np.ndarray]],
+        fetched: Dict[str, np.ndarray]
+    ) -> List[np.ndarray]:
+        """Add fetched embeddings to the LRU and fill in the misses"""
+        with self._emb_cache_lock:
+            for key, embedding in fetched.items():
+                self._emb_cache[key] = embedding
+            while len(self._emb_cache) > self.embedding_cache_size:
+                self._emb_cache.popitem(last=False)
+        
+        return [emb if emb is not None else fetched[key] for key, emb in zip(keys, embeddings)]
+    
+    def _get_cached_embeddings(self, texts: List[str]) -> List[np.ndarray]:
+        """
+        Embeddings for query texts, served from an LRU cache;
+        only cache misses are sent to OpenAI
+        """
+        keys, embeddings, missing = self._lookup_cached_embeddings(texts)
+        if not missing:
+            return embeddings
+        
+        fetched = dict(zip(missing, self._get_embeddings(missing)))
+        return self._store_cached_embeddings(keys, embeddings, fetched)
+    
+    def embed(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed query texts, sharing the LRU cache used by search"""
+        return self._get_cached_embeddings(texts)
+    
+    async def _aembed_uncached(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed texts with the async client, in concurrent token-packed requests"""
+        responses = await asyncio.gather(*[
+            self.async_openai_client.embeddings.create(
+                model=self.embedding_model,
+                input=texts[start:end],
+                **self._embedding_kwargs()
+            )
+            for start, end in pack_embedding_batches(texts)
+        ])
+        return [vector for response in responses for vector in decode_embeddings(response)]
+    
+    async def aembed(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed query texts with the async client, sharing the LRU cache used by search"""
+        keys, embeddings, missing = self._lookup_cached_embeddings(texts)
+        if not missing:
+            return embeddings
+        
+        if self.embedding_coalescer is not None:
+            vectors = await self.embedding_coalescer.submit(missing)
+        else:
+            vectors = await self._aembed_uncached(missing)
+        
+        return self._store_cached_embeddings(keys, embeddings, dict(zip(missing, vectors)))
+    
     def _generate_doc_id(self, content: str, metadata: Dict) -> str:
-        """Generate unique document ID based on content"""
-        hash_input = f"{content}{str(metadata)}"
-        return hashlib.md5(hash_input.encode()).hexdigest()
+        """
+        Generate unique document ID based on content and metadata
+        Only used for documents without a doc_id; DataLoader always assigns one
+        """
+        digest = hashlib.blake2b(content.encode(), digest_size=16)
+        digest.update(orjson.dumps(metadata, option=orjson.OPT_SORT_KEYS))
+        return digest.hexdigest()
+    
+    def _embed_batch(self, contents: List[str]) -> List[np.ndarray]:
+        """Embed one batch of document contents, each distinct text once"""
+        unique_contents = list(dict.fromkeys(contents))
+        unique_embeddings = dict(zip(unique_contents, self._get_document_embeddings(unique_contents)))
+        return [unique_embeddings[content] for content in contents]
+    
+    def _write_batch(self, contents: List[str], ids: List[str], metadatas: List[Dict], embeddings: Future) -> int:
+        """Write one batch once its embeddings are ready; returns the number written"""
+        try:
+            # upsert rather than add, so an id written by another process
+            # since _known_ids was loaded does not fail the whole batch
+            self._collection_call(
+                "upsert",
+                documents=contents,
+                embeddings=embeddings.result(),
+                ids=ids,
+                metadatas=metadatas
+            )
+        except Exception as e:
+            logger.error(f"Error adding batch: {e}")
+            return 0
+        
+        self._known_ids.update(ids)
+        self._clear_result_cache()
+        logger.info(f"Added batch of {len(ids)} documents")
+        return len(ids)
     
     def add_documents(self, documents: List[Document], batch_size: int = 100) -> int:
         """
         Add documents to the vector store
         
+        The next batch is embedded on a worker thread while the current one
+        is written to Chroma, so network and disk time overlap.
+        
         Args:
             documents: List of Document objects
             batch_size: Number of documents to process at once
@@ -88,44 +377,143 @@ class VectorStore:
             return 0
         
         added_count = 0
+        scheduled = set()
+        pending = None
         
-        for i in range(0, len(documents), batch_size):
-            batch = documents[i:i + batch_size]
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            for i in range(0, len(documents), batch_size):
+                batch = documents[i:i + batch_size]
+                
+                new_contents, new_ids, new_metadatas = [], [], []
+                for doc in batch:
+                    doc_id = doc.doc_id or self._generate_doc_id(doc.content, doc.metadata)
+                    if doc_id in self._known_ids or doc_id in scheduled:
+                        continue
+                    scheduled.add(doc_id)
+                    new_contents.append(doc.content)
+                    new_ids.append(doc_id)
+                    new_metadatas.append(doc.metadata)
+                
+                if not new_ids:
+                    continue
+                
+                embeddings = executor.submit(self._embed_batch, new_contents)
+                if pending is not None:
+                    added_count += self._write_batch(*pending)
+                pending = (new_contents, new_ids, new_metadatas, embeddings)
             
+            if pending is not None:
+                added_count += self._write_batch(*pending)
+        
+        logger.info(f"Total documents added: {added_count}")
+        return added_count
+    
+    def _format_results(self, results: Dict, index: int, threshold: float) -> List[Dict]:
+        """Format the results of one query from a Chroma query response"""
+        formatted_results = []
+        
+        if results['documents'] and results['documents'][index]:
+            for i, doc in enumerate(results['documents'][index]):
+                distance = results['distances'][index][i] if results['distances'] else 0
+                similarity = 1 - distance
+                
+                if similarity >= threshold:
+                    formatted_results.append({
+                        'content': doc,
+                        'metadata': results['metadatas'][index][i] if results['metadatas'] else {},
+                        'id': results['ids'][index][i] if results['ids'] else None,
+                        'similarity': similarity
+                    })
+        
+        return formatted_results
+    
+    async def add_documents_bulk(
+        self,
+        documents: List[Document],
+        batch_size: int = 256,
+        concurrency: int = 8
+    ) -> int:
+        """
+        Add documents to an empty or freshly cleared collection
+        
+        Embedding requests for up to `concurrency` batches are in flight at
+        once; each batch is written to Chroma as soon as its embeddings arrive.
+        Unlike add_documents, existing IDs are not checked; they are overwritten.
+        
+        Args:
+            documents: List of Document objects
+            batch_size: Maximum documents per embedding request; long documents make batches smaller
+            concurrency: Maximum concurrent embedding requests
+            
+        Returns:
+            Number of documents added
+        """
+        if not documents:
+            logger.warning("No documents to add")
+            return 0
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        write_lock = asyncio.Lock()
+        
+        async def process_batch(batch: List[Document]) -> int:
             contents = [doc.content for doc in batch]
             ids = [doc.doc_id or self._generate_doc_id(doc.content, doc.metadata) for doc in batch]
             metadatas = [doc.metadata for doc in batch]
             
             try:
-                existing = self.collection.get(ids=ids)
-                new_indices = [
-                    j for j, doc_id in enumerate(ids) 
-                    if doc_id not in existing['ids']
-                ]
+                unique_contents = list(dict.fromkeys(contents))
+                if self.embedding_store is not None:
+                    stored = await asyncio.to_thread(self.embedding_store.get_many, unique_contents)
+                else:
+                    stored = [None] * len(unique_contents)
+                unique_embeddings = {
+                    content: embedding
+                    for content, embedding in zip(unique_contents, stored)
+                    if embedding is not None
+                }
                 
-                if not new_indices:
-                    continue
+                missing = [content for content in unique_contents if content not in unique_embeddings]
+                if missing:
+                    async with semaphore:
+                        response = await self.async_openai_client.embeddings.create(
+                            model=self.embedding_model,
+                            input=missing,
+                            **self._embedding_kwargs()
+                        )
+                    fetched = decode_embeddings(response)
+                    if self.embedding_store is not None:
+                        await asyncio.to_thread(self.embedding_store.put_many, missing, fetched)
+                    unique_embeddings.update(zip(missing, fetched))
                 
-                new_contents = [contents[j] for j in new_indices]
-                new_ids = [ids[j] for j in new_indices]
-                new_metadatas = [metadatas[j] for j in new_indices]
+                embeddings = [unique_embeddings[content] for content in contents]
                 
-                embeddings = self._get_embeddings(new_contents)
+                async with write_lock:
+                    await asyncio.to_thread(
+                        self._collection_call,
+                        "upsert",
+                        documents=contents,
+                        embeddings=embeddings,
+                        ids=ids,
+                        metadatas=metadatas
+                    )
+                    self._known_ids.update(ids)
+                    self._clear_result_cache()
                 
-                self.collection.add(
-                    documents=new_contents,
-                    embeddings=embeddings,
-                    ids=new_ids,
-                    metadatas=new_metadatas
-                )
-                
-                added_count += len(new_indices)
-                logger.info(f"Added batch of {len(new_indices)} documents")
+                logger.info(f"Added batch of {len(batch)} documents")
+                return len(batch)
                 
             except Exception as e:
                 logger.error(f"Error adding batch: {e}")
-                continue
+                return 0
+        
+        contents = [doc.content for doc in documents]
+        batches = [
+            documents[start:end]
+            for start, end in pack_embedding_batches(contents, max_items=batch_size)
+        ]
+        added_counts = await asyncio.gather(*[process_batch(batch) for batch in batches])
         
+        added_count = sum(added_counts)
         logger.info(f"Total documents added: {added_count}")
         return added_count
     
@@ -149,34 +537,106 @@ class VectorStore:
             List of search results with content, metadata, and scores
         """
         try:
-            query_embedding = self._get_embeddings([query])[0]
-            
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=top_k,
-                where=filter_metadata
-            )
-            
-            formatted_results = []
+            query_embedding = self._get_cached_embeddings([query])[0]
+            return self.search_by_vectors([query_embedding], top_k, filter_metadata, threshold)[0]
             
-            if results['documents'] and results['documents'][0]:
-                for i, doc in enumerate(results['documents'][0]):
-                    distance = results['distances'][0][i] if results['distances'] else 0
-                    similarity = 1 - distance
-                    
-                    if similarity >= threshold:
-                        formatted_results.append({
-                            'content': doc,
-                            'metadata': results['metadatas'][0][i] if results['metadatas'] else {},
-                            'id': results['ids'][0][i] if results['ids'] else None,
-                            'similarity': similarity
-                        })
+        except Exception as e:
+            logger.error(f"Error searching: {e}")
+            return []
+    
+    def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        filter_metadata: Optional[Dict] = None,
+        threshold: float = 0.0
+    ) -> List[List[Dict]]:
+        """
+        Search for several queries at once
+        
+        All queries are embedded in a single OpenAI request and sent to
+        Chroma as one multi-vector query.
+        
+        Args:
+            queries: Search queries
+            top_k: Number of results to return per query
+            filter_metadata: Optional metadata filter
+            threshold: Minimum similarity score (0-1, higher is more similar)
             
-            return formatted_results
+        Returns:
+            One list of search results per query, in input order
+        """
+        if not queries:
+            return []
+        
+        try:
+            query_embeddings = self._get_cached_embeddings(queries)
+            return self.search_by_vectors(query_embeddings, top_k, filter_metadata, threshold)
             
         except Exception as e:
-            logger.error(f"Error searching: {e}")
+            logger.error(f"Error in batch search: {e}")
+            return [[] for _ in queries]
+    
+    def search_by_vectors(
+        self,
+        query_embeddings: List[List[float]],
+        top_k: int = 5,
+        filter_metadata: Optional[Dict] = None,
+        threshold: float = 0.0
+    ) -> List[List[Dict]]:
+        """
+        Search with precomputed query embeddings, as one multi-vector Chroma query
+        
+        Unfiltered queries whose vector is near-identical to an earlier one
+        are answered from the result cache without querying Chroma.
+        
+        Args:
+            query_embeddings: Query vectors, e.g. from embed/aembed
+            top_k: Number of results to return per query
+            filter_metadata: Optional metadata filter
+            threshold: Minimum similarity score (0-1, higher is more similar)
+            
+        Returns:
+            One list of search results per query vector, in input order
+        """
+        if not query_embeddings:
             return []
+        
+        if self.result_cache is None or filter_metadata is not None:
+            results = self._collection_call(
+                "query",
+                query_embeddings=query_embeddings,
+                n_results=top_k,
+                where=filter_metadata,
+                include=QUERY_INCLUDE
+            )
+            return [self._format_results(results, i, threshold) for i in range(len(query_embeddings))]
+        
+        # Cached entries are (top_k, unthresholded results); deeper entries serve shallower queries
+        found: List[Optional[List[Dict]]] = [None] * len(query_embeddings)
+        for i, vector in enumerate(query_embeddings):
+            cached = self.result_cache.get(vector)
+            if cached is not None and cached[0] >= top_k:
+                found[i] = cached[1][:top_k]
+        
+        missing = [i for i, results in enumerate(found) if results is None]
+        if missing:
+            results = self._collection_call(
+                "query",
+                query_embeddings=[query_embeddings[i] for i in missing],
+                n_results=top_k,
+                include=QUERY_INCLUDE
+            )
+            for j, i in enumerate(missing):
+                found[i] = self._format_results(results, j, 0.0)
+                self.result_cache.set(query_embeddings[i], (top_k, found[i]))
+        
+        return [[r for r in results if r['similarity'] >= threshold] for results in found]
+    
+    def _clear_result_cache(self) -> None:
+        """Drop cached search results after the collection changes"""
+        if self.result_cache is not None:
+            self.result_cache.clear()
     
     def search_qa_pairs(self, query: str, top_k: int = 3) -> List[Dict]:
         """Search specifically for QA pairs"""
@@ -198,7 +658,7 @@ class VectorStore:
         """Get statistics about the collection"""
         return {
             'name': self.collection_name,
-            'count': self.collection.count(),
+            'count': self._collection_call("count"),
             'persist_directory': str(self.persist_directory)
         }
     
@@ -208,8 +668,10 @@ class VectorStore:
             self.chroma_client.delete_collection(self.collection_name)
             self.collection = self.chroma_client.create_collection(
                 name=self.collection_name,
-                metadata={"hnsw:space": "cosine"}
+                metadata=self._collection_metadata()
             )
+            self._known_ids.clear()
+            self._clear_result_cache()
             logger.info(f"Cleared collection: {self.collection_name}")
         except Exception as e:
             logger.error(f"Error clearing collection: {e}")